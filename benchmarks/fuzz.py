@@ -0,0 +1,110 @@
+"""
+Per line cost of the amount tokenizers over adversarial lines, against the regexes they replace.
+
+    python -m benchmarks.fuzz --lengths 100 1000 10000
+
+- check: random lines out of digits, separators, spaces and suffixes, the tokenizers must give the same result as the regexes
+- timing: long runs of digit groups never ending in a valid amount, where the regexes backtrack quadratically while the tokenizers stay flat per character
+"""
+
+import argparse
+import random
+import re
+import time
+
+from typing import Any, Callable
+
+from bank_scrape import bca_credit, bca_debit
+
+# The regexes replaced by the tokenizers. The credit single line regex is kept, the space before the amount already bounds its backtracking
+CREDIT_MULTI_LINE_END_PATTERN = re.compile(r'^(.*?)(\d{1,3}(?:\.\d{3})*\s?(?:CR)?)$')
+DEBIT_AMOUNT_PATTERN = re.compile(r'(?<!\d)\d{1,3}(?:\,\d{3})*\.\d{1,2}(?: DB)?')
+DEBIT_BALANCE_PATTERN = re.compile(r'(?<!\d)\d{1,3}(,\d{3})*(\.\d{2})$')
+
+# Lines never contain a line break, which $ would match before
+ALPHABET = '0123456789' * 3 + '..,,  \tCRDBx'
+SUFFIXES = ('', '', 'CR', ' CR', ' DB', '.12', '.1 DB')
+
+
+def match_credit_multi_line_end(line: str) -> tuple | None:
+    kind, groups = bca_credit.match_multi_line(line)
+    return groups if kind == 'transaction_multi_line_end' else None
+
+
+def get_groups(match: re.Match | None) -> tuple | None:
+    return match.groups() if match else None
+
+
+def get_group(match: re.Match | None) -> str | None:
+    return match.group(0) if match else None
+
+
+# name: (regex, tokenizer, adversarial line of about the given length)
+CASES: dict[str, tuple[Callable[[str], Any], Callable[[str], Any], Callable[[int], str]]] = {
+    'credit multi line': (
+        lambda line: get_groups(CREDIT_MULTI_LINE_END_PATTERN.match(line)),
+        match_credit_multi_line_end,
+        lambda length: '1' + '.234' * (length // 4) + 'x',
+    ),
+    'debit amount': (
+        lambda line: get_group(DEBIT_AMOUNT_PATTERN.search(line)),
+        bca_debit.find_amount,
+        lambda length: '1' + ',234' * (length // 4),
+    ),
+    'debit balance': (
+        lambda line: DEBIT_BALANCE_PATTERN.sub('', line),
+        bca_debit.remove_balance,
+        lambda length: '1' + ',234' * (length // 4) + '.5',
+    ),
+}
+
+
+def get_random_line(rnd: random.Random) -> str:
+    return ''.join(rnd.choice(ALPHABET) for _ in range(rnd.randint(0, 24))) + rnd.choice(SUFFIXES)
+
+
+def check(name: str, lines: int, seed: int) -> int:
+    regex, tokenizer, _ = CASES[name]
+    rnd = random.Random(seed)
+    for _ in range(lines):
+        line = get_random_line(rnd)
+        if (expected := regex(line)) != (actual := tokenizer(line)):
+            raise Exception(f'{name}: {line!r} expected {expected!r}, got {actual!r}')
+
+    return lines
+
+
+def measure(fn: Callable[[str], Any], line: str, repeat: int) -> float:
+    # Best wall time of one call
+    seconds = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(line)
+        seconds = min(seconds, time.perf_counter() - start)
+
+    return seconds
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare the amount tokenizers against the regexes over adversarial lines')
+    parser.add_argument('--cases', nargs='+', choices=CASES, default=list(CASES))
+    parser.add_argument('--lengths', nargs='+', type=int, default=[100, 1000, 10000])
+    parser.add_argument('--lines', type=int, default=100000, help='random lines checked against the regexes')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    for name in args.cases:
+        print(f'{name}: {check(name, args.lines, args.seed)} random lines same as the regex')
+
+    print(f'{"case":<17} {"length":>7} {"regex µs":>11} {"ns/char":>9} {"tokenizer µs":>13} {"ns/char":>9}')
+    for name in args.cases:
+        regex, tokenizer, get_line = CASES[name]
+        for length in args.lengths:
+            line = get_line(length)
+            regex_seconds = measure(regex, line, args.repeat)
+            tokenizer_seconds = measure(tokenizer, line, args.repeat)
+            print(
+                f'{name:<17} {len(line):>7} {regex_seconds * 1e6:>11,.1f} {regex_seconds * 1e9 / len(line):>9,.1f}'
+                f' {tokenizer_seconds * 1e6:>13,.1f} {tokenizer_seconds * 1e9 / len(line):>9,.1f}'
+            )
@@ -0,0 +1,63 @@
+"""
+Import time of the package entry points, each measured in a fresh interpreter so nothing is already loaded.
+
+    python -m benchmarks.imports --repeat 5
+
+Exits with 1 when an entry point goes over its time budget or imports a dependency it must not, to guard the startup of the CLI and of serverless workers.
+Budgets are wall time milliseconds on a developer machine, scale them with --budget-scale on slower ones.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+# statement: (budget ms, dependencies which must not be imported)
+ENTRY_POINTS = {
+    'import bank_scrape': (10, ('pydantic', 'PyPDF2', 'concurrent.futures')),
+    'import bank_scrape.cli': (20, ('pydantic', 'PyPDF2', 'concurrent.futures')),
+    'from bank_scrape import parse_any': (20, ('pydantic', 'PyPDF2', 'concurrent.futures')),
+    'from bank_scrape import bca_credit': (150, ('PyPDF2',)),
+    'from bank_scrape import ParseCache': (150, ('PyPDF2',)),
+}
+
+# Run in the fresh interpreter, after its own startup
+MEASURE = '''
+import json, sys, time
+start = time.perf_counter()
+exec({statement!r})
+seconds = time.perf_counter() - start
+print(json.dumps([seconds, [x for x in {dependencies!r} if x in sys.modules], len(sys.modules)]))
+'''
+
+
+def measure(statement: str, dependencies: tuple[str, ...], repeat: int) -> tuple[float, list[str], int]:
+    """
+    Returns the best wall time out of repeat fresh interpreters, the forbidden dependencies imported and the number of loaded modules.
+    """
+
+    seconds = float('inf')
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', MEASURE.format(statement=statement, dependencies=dependencies)], check=True, capture_output=True, text=True)
+        run_seconds, imported, modules = json.loads(output.stdout)
+        seconds = min(seconds, run_seconds)
+
+    return seconds, imported, modules
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure the import time of the package entry points against their budget')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget-scale', type=float, default=1.0)
+    args = parser.parse_args()
+
+    failed = False
+    print(f'{"entry point":<36} {"ms":>7} {"budget":>7} {"modules":>8}  imported')
+    for statement, (budget, dependencies) in ENTRY_POINTS.items():
+        seconds, imported, modules = measure(statement, dependencies, args.repeat)
+        budget *= args.budget_scale
+        over = seconds * 1000 > budget or imported
+        failed |= bool(over)
+        print(f'{statement:<36} {seconds * 1000:>7.1f} {budget:>7.0f} {modules:>8}  {", ".join(imported) or "-"}{"  FAILED" if over else ""}')
+
+    sys.exit(1 if failed else 0)
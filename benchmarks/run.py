@@ -0,0 +1,101 @@
+"""
+Throughput and peak memory of each parsing stage over synthetic statements.
+
+    python -m benchmarks.run --banks bca-credit bca-debit --pages 1 10 100 500
+
+- extraction: PdfReader and page.extract_text() of every page, pdfium when pypdfium2 is installed, and worker processes with --extract-workers
+- parsing: the line state machine, from the page texts into records
+- rows: building the rows out of the records, validated / trusted / NamedTuple
+"""
+
+import argparse
+import io
+import time
+import tracemalloc
+
+from PyPDF2 import PdfReader
+from typing import Any, Callable
+
+from bank_scrape.parsers import get_parser
+from bank_scrape.sources import ExtractedTextSource, MemoizedTextSource, ParallelTextSource, PdfiumTextSource, PyPDF2TextSource
+from bank_scrape.utils.common import get_row_factory
+
+from .synthetic import GENERATORS, build_pdf
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> tuple[Any, float, int]:
+    """
+    Returns the result, the best wall time out of repeat runs and the peak traced memory of one more run.
+    The memory is traced separately since tracing slows down the run.
+    """
+
+    seconds = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        seconds = min(seconds, time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, seconds, peak
+
+
+def run(bank: str, pages: int, seed: int, repeat: int, extract_workers: int | None = None) -> list[tuple[str, int, float, int]]:
+    parser = get_parser(bank)
+    pdf = build_pdf(GENERATORS[bank](pages, seed))
+
+    results = []
+
+    def extract(source: MemoizedTextSource) -> list[str]:
+        return [source.get_text(page) for page in range(source.page_count)]
+
+    texts, seconds, peak = measure(lambda: extract(PyPDF2TextSource(PdfReader(io.BytesIO(pdf)))), repeat)
+    records, *_ = measure(lambda: list(parser.iter_records(ExtractedTextSource(texts))), 1)
+    results.append(('extraction', len(records), seconds, peak))
+
+    try:
+        _, seconds, peak = measure(lambda: extract(PdfiumTextSource(pdf)), repeat)
+        results.append(('extraction pdfium', len(records), seconds, peak))
+    except ImportError:
+        pass
+
+    if extract_workers is not None:
+        def extract_parallel() -> list[str]:
+            # Starting the workers is part of the cost
+            with ParallelTextSource(pdf, workers=extract_workers) as source:
+                return extract(source)
+
+        _, seconds, peak = measure(extract_parallel, repeat)
+        results.append((f'extraction x{extract_workers}', len(records), seconds, peak))
+
+    _, seconds, peak = measure(lambda: list(parser.iter_records(ExtractedTextSource(texts))), repeat)
+    results.append(('parsing', len(records), seconds, peak))
+
+    for stage, build_row in (
+        ('rows', get_row_factory(parser.PdfParsedRow)),
+        ('rows trusted', get_row_factory(parser.PdfParsedRow, trusted=True)),
+        ('rows tuple', get_row_factory(parser.PdfParsedRow, row_type=parser.PdfParsedRowTuple)),
+    ):
+        _, seconds, peak = measure(lambda: list(map(build_row, records)), repeat)
+        results.append((stage, len(records), seconds, peak))
+
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the parsing stages over synthetic statements')
+    parser.add_argument('--banks', nargs='+', choices=GENERATORS, default=list(GENERATORS))
+    parser.add_argument('--pages', nargs='+', type=int, default=[1, 10, 100, 500])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--extract-workers', type=int, default=None, help='also extract the pages with this many worker processes')
+    args = parser.parse_args()
+
+    print(f'{"bank":<14} {"pages":>5} {"stage":<17} {"rows":>7} {"seconds":>9} {"rows/sec":>11} {"peak MiB":>9}')
+    for bank in args.banks:
+        for pages in args.pages:
+            for stage, rows, seconds, peak in run(bank, pages, args.seed, args.repeat, args.extract_workers):
+                print(f'{bank:<14} {pages:>5} {stage:<17} {rows:>7} {seconds:>9.4f} {rows / seconds:>11,.0f} {peak / 1024 / 1024:>9.2f}')
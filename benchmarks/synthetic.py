@@ -0,0 +1,227 @@
+"""
+Reproducible synthetic statements for each bank format, as page text (read through bank_scrape.sources.ExtractedTextSource) or as text-layer PDFs.
+
+    python -m benchmarks.synthetic bca-credit 100 statement.pdf
+"""
+
+import argparse
+import random
+
+from datetime import date, timedelta
+from typing import Callable
+
+LINES_PER_PAGE = 40
+
+# Description words never end with digits, which would be read as an amount
+WORDS = (
+    'ALFAMART', 'INDOMARET', 'TOKOPEDIA', 'SHOPEE', 'GRAB', 'GOJEK', 'KOPI', 'KENANGAN', 'STARBUCKS', 'PT', 'TBK', 'JAKARTA', 'BANDUNG',
+    'SURABAYA', 'ID', 'SPBU', 'PERTAMINA', 'TRAVELOKA', 'TIKET', 'BLIBLI', 'APOTEK', 'HOKBEN', 'ZARA', 'UNIQLO', 'BIOSKOP',
+)
+
+# The card number line only allows letters in the owner
+OWNERS = ('BUDI SANTOSO', 'SITI RAHAYU', 'ANDI WIJAYA')
+
+BCA_TRANSACTION_MONTHS = ('JAN', 'FEB', 'MAR', 'APR', 'MEI', 'JUN', 'JUL', 'AGS', 'SEP', 'OKT', 'NOV', 'DES')
+BCA_SETTLEMENT_MONTHS = ('JANUARI', 'FEBRUARI', 'MARET', 'APRIL', 'MEI', 'JUNI', 'JULI', 'AGUSTUS', 'SEPTEMBER', 'OKTOBER', 'NOVEMBER', 'DESEMBER')
+JENIUS_TRANSACTION_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'Mei', 'Jun', 'Jul', 'Agt', 'Sep', 'Okt', 'Nov', 'Des')
+JENIUS_SETTLEMENT_MONTHS = ('Januari', 'Februari', 'Maret', 'April', 'Mei', 'Juni', 'Juli', 'Agustus', 'September', 'Oktober', 'November', 'Desember')
+
+# January settlement, the transactions of the previous month belong to the previous year
+SETTLEMENT_DATE = date(2024, 1, 15)
+
+
+def get_description(rnd: random.Random, min_words: int = 1, max_words: int = 4) -> str:
+    return ' '.join(rnd.choice(WORDS) for _ in range(rnd.randint(min_words, max_words)))
+
+
+def get_transaction_date(rnd: random.Random) -> date:
+    # Within the month before the settlement date, crossing the year boundary
+    return SETTLEMENT_DATE - timedelta(days=rnd.randint(0, 40))
+
+
+def generate_bca_credit(pages: int, seed: int = 0) -> list[str]:
+    rnd = random.Random(seed)
+    cards = [(f'{rnd.randint(1000, 9999)}-{rnd.randint(10, 99)}XX-XXXX-{rnd.randint(1000, 9999)}', owner) for owner in OWNERS]
+
+    texts = []
+    for page in range(pages):
+        lines = [
+            'REKENING KARTU KREDIT',
+            f'TANGGAL REKENING : {SETTLEMENT_DATE.day:02d} {BCA_SETTLEMENT_MONTHS[SETTLEMENT_DATE.month - 1]} {SETTLEMENT_DATE.year}',
+            f'HALAMAN {page + 1} / {pages}',
+            'TANGGAL TANGGAL KETERANGAN JUMLAH',
+            'TRANSAKSI PEMBUKUAN',
+        ]
+        if page == 0:
+            lines.append('SALDO SEBELUMNYA 1.234.567')
+
+        # A new card every few pages
+        card_number, owner = cards[page // 4 % len(cards)]
+        lines.append(f'{card_number} {owner}')
+
+        while len(lines) < LINES_PER_PAGE:
+            transaction_date = get_transaction_date(rnd)
+            posting_date = min(transaction_date + timedelta(days=rnd.randint(0, 2)), SETTLEMENT_DATE)
+            dates = ' '.join(f'{x.day:02d}-{BCA_TRANSACTION_MONTHS[x.month - 1]}' for x in (transaction_date, posting_date))
+            amount = f'{rnd.randint(1, 50_000_000):,}'.replace(',', '.')
+            if rnd.random() < 0.1:
+                amount = f'{amount}{rnd.choice(("CR", " CR"))}'
+
+            # Multi-line description
+            if rnd.random() < 0.25:
+                lines.append(f'{dates} {get_description(rnd)}')
+                lines.append(get_description(rnd, 1, 2))
+                lines.append(amount)
+            else:
+                lines.append(f'{dates} {get_description(rnd)} {amount}')
+
+        lines.append('TOTAL TAGIHAN')
+        texts.append('\n'.join(lines))
+
+    return texts
+
+
+def generate_bca_debit(pages: int, seed: int = 0) -> list[str]:
+    rnd = random.Random(seed)
+    balance = rnd.randint(1_000_000, 100_000_000) * 100
+
+    texts = []
+    for page in range(pages):
+        lines = [
+            'REKENING TAHAPAN',
+            'KCU JAKARTA',
+            'NO. REKENING : 1234567890',
+            f'HALAMAN : {page + 1} / {pages}',
+            f'PERIODE : {BCA_SETTLEMENT_MONTHS[SETTLEMENT_DATE.month - 1]} {SETTLEMENT_DATE.year}',
+            'TANGGAL KETERANGAN CBG MUTASI SALDO',
+        ]
+
+        while len(lines) < LINES_PER_PAGE:
+            day = rnd.randint(1, 28)
+            cents = rnd.randint(100, 10_000_000_00)
+            is_debit = rnd.random() < 0.7
+            balance += -cents if is_debit else cents
+            amount = f'{cents // 100:,}.{cents % 100:02d}{" DB" if is_debit else ""}'
+            ending_balance = f'{abs(balance) // 100:,}.{abs(balance) % 100:02d}'
+
+            lines.append(f'{day:02d}/{SETTLEMENT_DATE.month:02d} {rnd.choice(("TRSF E-BANKING", "KARTU DEBIT", "BI-FAST", "BIAYA ADM"))} {amount} {ending_balance}')
+            # Multi-line description
+            for _ in range(rnd.choice((0, 1, 2))):
+                lines.append(rnd.choice((f'{day:02d}{SETTLEMENT_DATE.month:02d}/FTSCY/WS{rnd.randint(10000, 99999)}', get_description(rnd, 1, 3))))
+
+        if page == pages - 1:
+            lines.append(f'SALDO AWAL : {balance // 100:,}.00')
+            lines.append('MUTASI CR : 0.00')
+        else:
+            lines.append('Bersambung ke Halaman berikut')
+        texts.append('\n'.join(lines))
+
+    # Terms and conditions after the end of the statement
+    texts.append('SYARAT DAN KETENTUAN\nHarap periksa mutasi rekening anda')
+
+    return texts
+
+
+def generate_jenius_credit(pages: int, seed: int = 0) -> list[str]:
+    rnd = random.Random(seed)
+
+    texts = []
+    for page in range(pages):
+        lines = [
+            'Tagihan Kartu Kredit Jenius',
+            'Tanggal Cetak Tagihan',
+            f'{SETTLEMENT_DATE.day} {JENIUS_SETTLEMENT_MONTHS[SETTLEMENT_DATE.month - 1]} {SETTLEMENT_DATE.year}',
+            'Nomor Kartu',
+            '5123 45XX XXXX 6789',
+            'Pemegang Kartu',
+            'JOHN DOE',
+            'Tanggal Transaksi Tanggal Pembukuan Keterangan Jumlah',
+        ]
+
+        while len(lines) < LINES_PER_PAGE:
+            transaction_date = get_transaction_date(rnd)
+            for x in (transaction_date, min(transaction_date + timedelta(days=1), SETTLEMENT_DATE)):
+                lines.append(f'{x.day:02d} {JENIUS_TRANSACTION_MONTHS[x.month - 1]} {x.year}')
+
+            # Multi-line description
+            for _ in range(rnd.randint(1, 3)):
+                lines.append(get_description(rnd, 1, 3))
+
+            cents = rnd.randint(100, 50_000_000_00)
+            lines.append(f'{cents // 100:,}.{cents % 100:02d}')
+            if rnd.random() < 0.1:
+                lines.append('CR')
+
+        if page == pages - 1:
+            lines.append('Pembayaran Tagihan')
+        texts.append('\n'.join(lines))
+
+    # Terms and conditions after the end of the statement
+    texts.append('Syarat dan Ketentuan\nPembayaran minimum')
+
+    return texts
+
+
+GENERATORS: dict[str, Callable[[int, int], list[str]]] = {
+    'bca-credit': generate_bca_credit,
+    'bca-debit': generate_bca_debit,
+    'jenius-credit': generate_jenius_credit,
+}
+
+
+def escape_pdf_text(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def build_pdf(texts: list[str]) -> bytes:
+    """
+    Build an unencrypted PDF with one text line per line of each page, using the built-in Helvetica font.
+    """
+
+    objects: list[bytes] = []
+
+    def add_object(data: bytes) -> int:
+        objects.append(data)
+        return len(objects)
+
+    font_id = add_object(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+    # The page tree is added after its pages, each page takes two objects
+    pages_id = font_id + 2 * len(texts) + 1
+
+    page_ids = []
+    for text in texts:
+        operations = ['BT', '/F1 8 Tf', '10 TL', '30 810 Td']
+        operations += [f'({escape_pdf_text(line)}) Tj T*' for line in text.split('\n')]
+        operations.append('ET')
+        stream = '\n'.join(operations).encode('latin-1')
+
+        contents_id = add_object(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream))
+        page_ids.append(add_object(b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>' % (pages_id, font_id, contents_id)))
+
+    add_object(b'<< /Type /Pages /Kids [%s] /Count %d >>' % (b' '.join(b'%d 0 R' % x for x in page_ids), len(page_ids)))
+    catalog_id = add_object(b'<< /Type /Catalog /Pages %d 0 R >>' % pages_id)
+
+    pdf = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for i, data in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b'%d 0 obj\n%s\nendobj\n' % (i, data)
+
+    xref_offset = len(pdf)
+    pdf += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    pdf += b''.join(b'%010d 00000 n \n' % x for x in offsets)
+    pdf += b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, catalog_id, xref_offset)
+
+    return bytes(pdf)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write a synthetic statement PDF')
+    parser.add_argument('bank', choices=GENERATORS)
+    parser.add_argument('pages', type=int)
+    parser.add_argument('output')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with open(args.output, 'wb') as f:
+        f.write(build_pdf(GENERATORS[args.bank](args.pages, args.seed)))
@@ -0,0 +1,91 @@
+import importlib
+
+from typing import TYPE_CHECKING, Any
+
+# Public names and the module defining them, imported on first access so that importing the package (e.g. the CLI, a serverless cold start) only loads what's used
+LAZY_ATTRIBUTES = {
+    'parse_async': 'aio',
+    'stream_many_async': 'aio',
+    'FileResult': 'batch',
+    'iter_parse_many': 'batch',
+    'iter_parse_results': 'batch',
+    'parse_file': 'batch',
+    'parse_many': 'batch',
+    'ParseCache': 'cache',
+    'ColumnarStatement': 'columnar',
+    'ParquetSink': 'columnar',
+    'parse_columnar': 'columnar',
+    'PasswordResolver': 'decrypt',
+    'decrypt_batch': 'decrypt',
+    'Diagnostic': 'diagnostics',
+    'ParseError': 'diagnostics',
+    'detect_bank': 'parsers',
+    'parse_any': 'parsers',
+    'PostgresSink': 'sinks',
+    'SqliteSink': 'sinks',
+    'ParseStats': 'stats',
+    'StatementStore': 'store',
+    'FolderWatcher': 'watch',
+    'Manifest': 'watch',
+}
+
+# Parser modules, e.g. bank_scrape.bca_credit.parse()
+LAZY_MODULES = ('bca_credit', 'bca_debit', 'jenius_credit')
+
+if TYPE_CHECKING:
+    from . import bca_credit, bca_debit, jenius_credit
+    from .aio import parse_async, stream_many_async
+    from .batch import FileResult, iter_parse_many, iter_parse_results, parse_file, parse_many
+    from .cache import ParseCache
+    from .columnar import ColumnarStatement, ParquetSink, parse_columnar
+    from .decrypt import PasswordResolver, decrypt_batch
+    from .diagnostics import Diagnostic, ParseError
+    from .parsers import detect_bank, parse_any
+    from .sinks import PostgresSink, SqliteSink
+    from .stats import ParseStats
+    from .store import StatementStore
+    from .watch import FolderWatcher, Manifest
+
+
+__all__ = [
+    'ColumnarStatement',
+    'Diagnostic',
+    'FileResult',
+    'FolderWatcher',
+    'Manifest',
+    'ParquetSink',
+    'ParseCache',
+    'ParseError',
+    'ParseStats',
+    'PasswordResolver',
+    'PostgresSink',
+    'SqliteSink',
+    'StatementStore',
+    'decrypt_batch',
+    'detect_bank',
+    'iter_parse_many',
+    'iter_parse_results',
+    'parse_any',
+    'parse_async',
+    'parse_columnar',
+    'parse_file',
+    'parse_many',
+    'stream_many_async',
+]
+
+
+def __getattr__(name: str) -> Any:
+    if (module := LAZY_ATTRIBUTES.get(name)) is not None:
+        value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    elif name in LAZY_MODULES:
+        value = importlib.import_module(f'.{name}', __name__)
+    else:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+    # Cached, the next access doesn't go through __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__) | set(LAZY_MODULES))
@@ -0,0 +1,64 @@
+import asyncio
+
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, AsyncIterable, AsyncIterator, Iterable
+
+from .batch import parse_file
+
+
+async def parse_async(file: str | bytes, password: str | None, bank: str = 'auto', executor: Executor | None = None) -> list[Any]:
+    """
+    Decrypt, extract and parse a file without blocking the event loop, in the default executor of the loop unless given.
+    """
+
+    return await asyncio.get_running_loop().run_in_executor(executor, parse_file, file, password, bank)
+
+
+async def iter_sources(sources: Iterable[str | bytes] | AsyncIterable[str | bytes]) -> AsyncIterator[str | bytes]:
+    if isinstance(sources, AsyncIterable):
+        async for source in sources:
+            yield source
+    else:
+        for source in sources:
+            yield source
+
+
+async def stream_many_async(
+    sources: Iterable[str | bytes] | AsyncIterable[str | bytes],
+    password: str | None,
+    bank: str = 'auto',
+    concurrency: int = 4,
+    executor: Executor | None = None,
+) -> AsyncIterator[Any]:
+    """
+    Stream the parsed rows of many files, in the same order as the given sources.
+
+    At most concurrency files are in flight, the next source is only read once the rows of the oldest file are consumed, so a slow consumer holds back the parsing.
+    Without an executor, a process pool of concurrency workers is used and shut down once the stream ends.
+    """
+
+    loop = asyncio.get_running_loop()
+    owned = executor is None
+    if owned:
+        executor = ProcessPoolExecutor(max_workers=concurrency)
+
+    pending: deque[asyncio.Future] = deque()
+    try:
+        async for source in iter_sources(sources):
+            pending.append(loop.run_in_executor(executor, parse_file, source, password, bank))
+            if len(pending) < concurrency:
+                continue
+
+            for row in await pending.popleft():
+                yield row
+
+        while pending:
+            for row in await pending.popleft():
+                yield row
+    finally:
+        # The consumer stopped early or a file failed
+        for future in pending:
+            future.cancel()
+        if owned:
+            executor.shutdown(wait=False, cancel_futures=True)
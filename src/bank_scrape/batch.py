@@ -0,0 +1,116 @@
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Any, Iterable, Iterator, NamedTuple
+
+from .diagnostics import Diagnostic
+from .parsers import get_parser, iter_parse_any
+from .sources import ParallelTextSource
+from .stats import ParseStats
+from .utils.common import open_pdf
+
+
+class FileResult(NamedTuple):
+    file: str
+    rows: list[Any]
+    diagnostics: list[Diagnostic]
+
+    @property
+    def failed(self) -> bool:
+        return bool(self.diagnostics)
+
+
+def iter_parse_file(
+    file: str | bytes,
+    password: str | list[str] | None,
+    bank: str = 'auto',
+    stats: ParseStats | None = None,
+    strict: bool = True,
+    diagnostics: list[Diagnostic] | None = None,
+    extract_workers: int | None = None,
+) -> Iterator[Any]:
+    start = time.perf_counter()
+    # Each extraction worker opens and decrypts the file on its own
+    pdf = open_pdf(file, password) if extract_workers is None else ParallelTextSource(file, password, extract_workers)
+    if stats is not None:
+        stats.add_stage_seconds('decryption', time.perf_counter() - start)
+
+    try:
+        if bank == 'auto':
+            yield from iter_parse_any(pdf, stats, strict, diagnostics)
+        else:
+            yield from get_parser(bank).iter_parse(pdf, stats=stats, strict=strict, diagnostics=diagnostics)
+    finally:
+        if isinstance(pdf, ParallelTextSource):
+            pdf.close()
+        else:
+            # The mmap of a path is released right away rather than on garbage collection
+            pdf.stream.close()
+
+
+def parse_file(
+    file: str | bytes,
+    password: str | list[str] | None,
+    bank: str = 'auto',
+    stats: ParseStats | None = None,
+    strict: bool = True,
+    diagnostics: list[Diagnostic] | None = None,
+    extract_workers: int | None = None,
+) -> list[Any]:
+    """
+    With strict=False, transactions which can't be parsed are skipped and reported into diagnostics.
+    A file which can't be read at all (e.g. wrong password, unknown format) is reported as well, keeping the rows parsed before the failure.
+    With extract_workers, the pages of a very large statement are extracted by that many worker processes.
+    """
+
+    if strict:
+        return list(iter_parse_file(file, password, bank, stats, extract_workers=extract_workers))
+
+    if diagnostics is None:
+        diagnostics = []
+    diagnostics_start = len(diagnostics)
+
+    rows = []
+    try:
+        for row in iter_parse_file(file, password, bank, stats, False, diagnostics, extract_workers):
+            rows.append(row)
+    except Exception as e:
+        diagnostics.append(Diagnostic(rule='file', message=str(e)))
+
+    if isinstance(file, str):
+        for diagnostic in diagnostics[diagnostics_start:]:
+            diagnostic.file = file
+
+    return rows
+
+
+def parse_file_result(file: str, password: str | list[str] | None, bank: str = 'auto', strict: bool = False, extract_workers: int | None = None) -> FileResult:
+    diagnostics = []
+    return FileResult(file, parse_file(file, password, bank, strict=strict, diagnostics=diagnostics, extract_workers=extract_workers), diagnostics)
+
+
+def iter_parse_many(files: Iterable[str], password: str | list[str] | None, bank: str = 'auto', workers: int | None = None) -> Iterator[tuple[str, list[Any]]]:
+    """
+    Parse many files in a process pool, each worker opens, decrypts and parses its own file.
+    The parsed rows of each file are yielded in the same order as the given files, as soon as the file and all files before it are done.
+    """
+
+    files = list(files)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from zip(files, executor.map(parse_file, files, repeat(password), repeat(bank)))
+
+
+def iter_parse_results(files: Iterable[str], password: str | list[str] | None, bank: str = 'auto', workers: int | None = None) -> Iterator[FileResult]:
+    """
+    Same as iter_parse_many without stopping at the first failure, the clean rows and diagnostics of each file are yielded in the same order as the given files.
+    Only the failed files need to be parsed again once fixed.
+    """
+
+    files = list(files)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(parse_file_result, files, repeat(password), repeat(bank))
+
+
+def parse_many(files: Iterable[str], password: str | list[str] | None, bank: str = 'auto', workers: int | None = None) -> list[Any]:
+    return [row for _, rows in iter_parse_many(files, password, bank, workers) for row in rows]
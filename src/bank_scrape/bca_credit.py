@@ -1,23 +1,41 @@
+from __future__ import annotations
+
+import functools
 import re
+import sys
 
 from datetime import date, timedelta
-from pydantic import BaseModel
-from PyPDF2 import PdfReader
-from queue import Queue
+from typing import TYPE_CHECKING, Callable, Iterator, NamedTuple
+
+from .diagnostics import Diagnostic, DiagnosticReporter
+from .sources import TextSource
+from .utils.amounts import get_reversed_number_regex, rmatch_start
+from .utils.common import clean_line, get_cents, get_date, iter_pdf_lines, iter_rows
+from .utils.lines import LineDispatcher
+from .utils.rows import AmountView, ParsedRow
+
+# Only used in annotations, PyPDF2 is imported once a pdf is actually read
+if TYPE_CHECKING:
+    from PyPDF2 import PdfReader
 
-from .utils.common import clean_line
+    from .stats import ParseStats
 
 REGEX_CARD_NUMBER = r'^(\d{4}-\d{2}XX-XXXX-\d{4})\s+([A-Za-z]+(?:\s+[A-Za-z]+)*)$'
 REGEX_SETTLEMENT_DATE = r'^TANGGAL REKENING :\s*(\d{2} [A-Z]+ \d{4})$'
 
 REGEX_TRANSACTION_BEGIN_EMPTY = r'^SALDO SEBELUMNYA'
+# Linear, the space before the amount bounds each attempt of the lazy description to the next word
 REGEX_TRANSACTION_SINGLE_LINE = r'^(\d{2}-[A-Z]{3}) (\d{2}-[A-Z]{3}) (.*?) (\d{1,3}(?:\.\d{3})*\s?(?:CR)?)$'
 REGEX_TRANSACTION_MULTI_LINE_START = r'^(\d{2}-[A-Z]{3}) (\d{2}-[A-Z]{3}) (.*?)$'
-REGEX_TRANSACTION_MULTI_LINE_MIDDLE = r'^(.*?)$'
-REGEX_TRANSACTION_MULTI_LINE_END = r'^(.*?)(\d{1,3}(?:\.\d{3})*\s?(?:CR)?)$'
 
 REGEX_TRANSACTION_VALIDATION = r'^(\d{2}-[A-Z]{3})'
 
+# The amount ending the last line of a multi-line transaction, \d{1,3}(?:\.\d{3})*\s?(?:CR)?, right to left
+REGEX_TRANSACTION_MULTI_LINE_END_REVERSED = rf'(?:RC)?\s?{get_reversed_number_regex(".")}'
+
+# Bump whenever the parsed output changes, this invalidates the cached parse results
+PARSER_VERSION = '2'
+
 EMPTY_CARD_PLACEHOLDER = 'XXXX-XXXX-XXXX-XXXX'
 
 TRANSACTION_MONTHS_MAP = {
@@ -52,56 +70,159 @@ SETTLEMENT_MONTHS_MAP = {
 }
 
 
-class PdfParsedRow(BaseModel):
+LINE_DISPATCHER = LineDispatcher({
+    'settlement_date': REGEX_SETTLEMENT_DATE,
+    'card_number': REGEX_CARD_NUMBER,
+    'transaction_begin_empty': REGEX_TRANSACTION_BEGIN_EMPTY,
+    'transaction_single_line': REGEX_TRANSACTION_SINGLE_LINE,
+    'transaction_multi_line_start': REGEX_TRANSACTION_MULTI_LINE_START,
+})
+# Handled before the continuation of a multi-line transaction
+HEADER_KINDS = ('settlement_date', 'card_number', 'transaction_begin_empty')
+VALIDATION_PATTERN = re.compile(REGEX_TRANSACTION_VALIDATION)
+MULTI_LINE_END_REVERSED_PATTERN = re.compile(REGEX_TRANSACTION_MULTI_LINE_END_REVERSED)
+
+
+class PdfParsedRow(ParsedRow):
     card_number: str
     owner: str
     transaction_date: date
     posting_date: date
     settlement_date: date
-    amount: float
+    amount_cents: int
     description: str
     order: int
 
 
-def parse(pdf: PdfReader) -> list[PdfParsedRow]:
-    # Part 1: extract raw data without modifications
-    data: list[dict] = []
-    validation_transaction_count = 0
+class PdfParsedRowFields(NamedTuple):
+    card_number: str
+    owner: str
+    transaction_date: date
+    posting_date: date
+    settlement_date: date
+    amount_cents: int
+    description: str
+    order: int
+
+
+# A NamedTuple can't have other bases, the amount view is mixed into a subclass
+class PdfParsedRowTuple(PdfParsedRowFields, AmountView):
+    __slots__ = ()
+
+
+def match_multi_line(line: str) -> tuple[str, tuple[str, ...]]:
+    """
+    Any line continues the description until one ends with an amount, the description before it may be empty.
+    Same as a lazy description followed by the amount, which backtracks quadratically on long lines of digits and dots.
+    The longest amount ending the reversed line is the one the lazy description would leave.
+    """
+
+    if (start := rmatch_start(MULTI_LINE_END_REVERSED_PATTERN, line)) != -1:
+        return 'transaction_multi_line_end', (line[:start], line[start:])
+
+    return 'transaction_multi_line_middle', (line,)
+
+
+def get_amount(amount: str) -> int:
+    if amount.endswith('CR'):
+        return get_cents(amount.removesuffix('CR'), '.', ',')
+    else:
+        return -get_cents(amount, '.', ',')
+
 
-    q = Queue()
-    lines = '\n'.join([page.extract_text() for page in pdf.pages])
-    [q.put(line) for line in lines.split('\n')]
+@functools.lru_cache(maxsize=128)
+def get_dates(settlement_date: date) -> dict[str, date]:
+    """
+    Every transaction and posting date text of a statement resolved against its settlement date, built once per settlement date.
+    The returned table is shared, never modify it.
+    """
+
+    # Handle year transition because the transaction and posting date doesn't have year part
+    previous_year = (settlement_date.replace(day=1) + timedelta(days=-1)).year
+
+    dates = {}
+    for text, month in TRANSACTION_MONTHS_MAP.items():
+        year = settlement_date.year if settlement_date.month == month else previous_year
+        for day in range(1, 32):
+            try:
+                dates[f'{day:02d}-{text}'] = date(year, month, day)
+            except ValueError:
+                # Past the end of the month
+                break
+
+    return dates
+
+
+def get_settlement_date(text: str) -> date:
+    try:
+        day, month, year = text.split(' ')
+        return date(int(year), SETTLEMENT_MONTHS_MAP[month], int(day))
+    except (KeyError, ValueError):
+        raise Exception(f'Invalid settlement date: {text}') from None
+
+
+def iter_records(
+    pdf: str | bytes | memoryview | PdfReader | TextSource,
+    stats: ParseStats | None = None,
+    diagnostics: list[Diagnostic] | None = None,
+    extract_workers: int | None = None,
+) -> Iterator[tuple]:
+    """
+    Stream the parsed records as tuples in the field order of PdfParsedRow.
+    Pages are extracted one at a time and each record is yielded as soon as its transaction is complete.
+    The transaction count validation runs once the last page is consumed, after all records have been yielded.
+    Given a diagnostics list, a transaction which can't be parsed is reported into it and skipped instead of raising a ParseError.
+    With extract_workers, the pages of a path or bytes are extracted ahead by that many worker processes, see ParallelTextSource.
+    """
+
+    order = 0
+    validation_transaction_count = 0
 
     # Main data
     settlement_date = None
     card_number = None
+    # Lines are only counted per classification when collecting stats, a continuation line only by its multi-line classification
+    count_line = None if stats is None else stats.count_line
+    classify_multi_line = match_multi_line if stats is None else stats.count_lines(match_multi_line)
     # Aux
     beginning_of_file = True
     is_multiline = False
-    while not q.empty():
-        line = q.get()
-        if not line:
+    dates: dict[str, date] = {}
+    reporter = DiagnosticReporter(diagnostics)
+    for line_number, raw_line in enumerate(iter_pdf_lines(pdf, stats, reporter.page_starts, extract_workers), 1):
+        if not raw_line:
             continue
 
-        line = clean_line(line)
+        # Diagnostics keep the line as extracted
+        line = clean_line(raw_line)
 
         # Validation: add line to validation sets
-        if re.match(REGEX_TRANSACTION_VALIDATION, line):
+        if VALIDATION_PATTERN.match(line):
             validation_transaction_count += 1
 
+        kind, groups = LINE_DISPATCHER.match(line)
+        if count_line is not None and (not is_multiline or kind in HEADER_KINDS):
+            count_line(kind)
+
         # Get settlement date
-        if match_settlement_date := re.match(REGEX_SETTLEMENT_DATE, line):
-            day, month, year = match_settlement_date.group(1).split(' ')
-            settlement_date = date(int(year), SETTLEMENT_MONTHS_MAP[month], int(day))
+        if kind == 'settlement_date':
+            try:
+                settlement_date = get_settlement_date(groups[0])
+            except Exception as e:
+                reporter.report('invalid_settlement_date', str(e), line_number, raw_line)
+                continue
+
+            dates = get_dates(settlement_date)
             continue
 
         # Detect a card number line, the beginning of statements
-        if match_card_number := re.match(REGEX_CARD_NUMBER, line):
-            card_number, owner = match_card_number.groups()
+        if kind == 'card_number':
+            # Shared by every row of the card
+            card_number, owner = sys.intern(groups[0]), sys.intern(groups[1])
             beginning_of_file = False
             continue
         # There's a case when transactions begin without card number, identified by line 'SALDO SEBELUMNYA'
-        elif re.match(REGEX_TRANSACTION_BEGIN_EMPTY, line):
+        elif kind == 'transaction_begin_empty':
             card_number = EMPTY_CARD_PLACEHOLDER
             owner = EMPTY_CARD_PLACEHOLDER
             beginning_of_file = False
@@ -112,90 +233,103 @@ def parse(pdf: PdfReader) -> list[PdfParsedRow]:
 
         # Validation: card number must be found before any transaction
         if card_number is None:
-            raise Exception(f'Card number not found, current line: {line}')
+            reporter.report('card_number_not_found', f'Card number not found, current line: {line}', line_number, raw_line)
+            continue
 
         # Validation: settlement date must be found before any transaction
         if settlement_date is None:
-            raise Exception(f'Settlement date not found, current line: {line}')
+            reporter.report('settlement_date_not_found', f'Settlement date not found, current line: {line}', line_number, raw_line)
+            continue
 
         # Evaluate a continuation of a multi-line transaction
         if is_multiline:
-            if match_transaction := re.match(REGEX_TRANSACTION_MULTI_LINE_END, line):
-                description, amount = match_transaction.groups()
-                final_description = f'{final_description} {description}'
-                data.append({
-                    'card_number': card_number,
-                    'owner': owner,
-                    'transaction_date': transaction_date,
-                    'posting_date': posting_date,
-                    'settlement_date': settlement_date,
-                    'description': final_description,
-                    'amount': amount,
-                })
+            multi_line_kind, multi_line_groups = classify_multi_line(line)
+            if multi_line_kind == 'transaction_multi_line_end':
+                description, amount = multi_line_groups
+                order += 1
                 is_multiline = False
+                try:
+                    record = (
+                        card_number,
+                        owner,
+                        get_date(transaction_date, dates),
+                        get_date(posting_date, dates),
+                        settlement_date,
+                        get_amount(amount),
+                        f'{final_description} {description}',
+                        order,
+                    )
+                except Exception as e:
+                    reporter.report('invalid_transaction', str(e), line_number, raw_line)
+                    continue
+
+                yield record
                 continue
-            elif match_transaction := re.match(REGEX_TRANSACTION_MULTI_LINE_MIDDLE, line):
-                final_description = f'{final_description} {match_transaction.group(0)}'
+            elif multi_line_kind == 'transaction_multi_line_middle':
+                final_description = f'{final_description} {multi_line_groups[0]}'
                 continue
 
         # Get a single transaction line
-        if match_transaction := re.match(REGEX_TRANSACTION_SINGLE_LINE, line):
-            transaction_date, posting_date, final_description, amount = match_transaction.groups()
-
-            data.append({
-                'card_number': card_number,
-                'owner': owner,
-                'transaction_date': transaction_date,
-                'posting_date': posting_date,
-                'settlement_date': settlement_date,
-                'description': final_description,
-                'amount': amount,
-            })
+        if kind == 'transaction_single_line':
+            transaction_date, posting_date, final_description, amount = groups
+
+            order += 1
+            try:
+                record = (
+                    card_number,
+                    owner,
+                    get_date(transaction_date, dates),
+                    get_date(posting_date, dates),
+                    settlement_date,
+                    get_amount(amount),
+                    final_description,
+                    order,
+                )
+            except Exception as e:
+                reporter.report('invalid_transaction', str(e), line_number, raw_line)
+                continue
+
+            yield record
             continue
 
         # Get a multi-line transaction description
-        if match_transaction := re.match(REGEX_TRANSACTION_MULTI_LINE_START, line):
-            transaction_date, posting_date, final_description = match_transaction.groups()
+        if kind == 'transaction_multi_line_start':
+            transaction_date, posting_date, final_description = groups
             is_multiline = True
             continue
 
-    # Validate the transaction count
-    if len(data) != validation_transaction_count:
-        raise Exception(f'Validation failed: {len(data)} != {validation_transaction_count}')
-
-    # Part 2: data formatting
-    for i, datum in enumerate(data, 1):
-        # Amount
-        if datum['amount'].endswith('CR'):
-            datum['amount'] = float(datum['amount'].removesuffix('CR').replace('.', '').replace(',', '.'))
-        else:
-            datum['amount'] = -float(datum['amount'].replace('.', '').replace(',', '.'))
-
-        # Transaction date
-        # Handle year transition because the transaction date doesn't have year part
-        day, month = datum['transaction_date'].split('-')
-        month = TRANSACTION_MONTHS_MAP[month]
-        year = datum['settlement_date'].year if datum['settlement_date'].month == month else (datum['settlement_date'].replace(day=1) + timedelta(days=-1)).year
-        transaction_date = date(year, month, int(day))
-        datum['transaction_date'] = transaction_date
-
-        # Posting date
-        # Handle year transition because the posting date doesn't have year part
-        day, month = datum['posting_date'].split('-')
-        month = TRANSACTION_MONTHS_MAP[month]
-        year = datum['settlement_date'].year if datum['settlement_date'].month == month else (datum['settlement_date'].replace(day=1) + timedelta(days=-1)).year
-        posting_date = date(year, month, int(day))
-        datum['posting_date'] = posting_date
-
-        datum['order'] = i
-
-    return [PdfParsedRow(
-        card_number=datum['card_number'],
-        owner=datum['owner'],
-        transaction_date=datum['transaction_date'],
-        posting_date=datum['posting_date'],
-        settlement_date=datum['settlement_date'],
-        amount=datum['amount'],
-        description=datum['description'],
-        order=datum['order'],
-    ) for datum in data]
+    # Validate the transaction count, skipped transactions included
+    if order != validation_transaction_count:
+        reporter.report('transaction_count', f'Validation failed: {order} != {validation_transaction_count}')
+
+
+def iter_parse(
+    pdf: str | bytes | memoryview | PdfReader | TextSource,
+    trusted: bool = False,
+    row_type: Callable | None = None,
+    stats: ParseStats | None = None,
+    strict: bool = True,
+    diagnostics: list[Diagnostic] | None = None,
+    extract_workers: int | None = None,
+) -> Iterator[PdfParsedRow]:
+    """
+    With strict=False, a transaction which can't be parsed is skipped and reported into diagnostics instead of raising a ParseError.
+    With extract_workers, the pages of a path or bytes are extracted by that many worker processes for very large statements.
+    """
+
+    if not strict and diagnostics is None:
+        diagnostics = []
+    records = iter_records(pdf, stats, None if strict else diagnostics, extract_workers)
+    yield from iter_rows(PdfParsedRow, records, trusted, row_type, stats)
+
+
+def parse(
+    pdf: str | bytes | memoryview | PdfReader | TextSource,
+    trusted: bool = False,
+    row_type: Callable | None = None,
+    stats: ParseStats | None = None,
+    strict: bool = True,
+    diagnostics: list[Diagnostic] | None = None,
+    extract_workers: int | None = None,
+) -> list[PdfParsedRow]:
+    return list(iter_parse(pdf, trusted, row_type, stats, strict, diagnostics, extract_workers))
@@ -1,28 +1,47 @@
+from __future__ import annotations
+
+import functools
 import re
+import sys
 
 from datetime import date
-from datetime import datetime
-from pydantic import BaseModel
-from PyPDF2 import PdfReader
-from queue import Queue
+from typing import TYPE_CHECKING, Callable, Iterator, NamedTuple
+
+from .diagnostics import Diagnostic, DiagnosticReporter
+from .sources import TextSource
+from .utils.amounts import NUMBER_START_PATTERN, find_number_end, get_reversed_number_regex, rmatch_start
+from .utils.common import clean_line, get_cents, get_date, iter_pdf_lines, iter_rows
+from .utils.lines import LineDispatcher
+from .utils.rows import AmountView, ParsedRow
 
-from .utils.common import clean_line
+# Only used in annotations, PyPDF2 is imported once a pdf is actually read
+if TYPE_CHECKING:
+    from PyPDF2 import PdfReader
+
+    from .stats import ParseStats
 
 REGEX_CARD_NUMBER = r'NO\. REKENING :\s*([0-9]+)$'
 REGEX_SETTLEMENT_DATE = r'^PERIODE :\s*([A-Z]+ \d{4})$'
 
 REGEX_TRANSACTION_START = r'^(\d{2}/\d{2}) (.*)'
-REGEX_TRANSACTION_AMOUNT = r'(?<!\d)\d{1,3}(?:\,\d{3})*\.\d{1,2}(?: DB)?'
-REGEX_TRANSACTION_BALANCE = r'(?<!\d)\d{1,3}(,\d{3})*(\.\d{2})$'
 
 REGEX_TRANSACTION_VALIDATION = r'(\d{2}/\d{2})'
 
+# The balance ending a description, (?<!\d)\d{1,3}(,\d{3})*(\.\d{2})$, right to left
+REGEX_TRANSACTION_BALANCE_REVERSED = rf'\d{{2}}\.{get_reversed_number_regex(",")}(?!\d)'
+
+AMOUNT_SUFFIX_DB = ' DB'
+
+LINESTART_FILE_END = 'SALDO AWAL :'
 LINESTART_TRANSACTION_END = (
     'Bersambung ke Halaman berikut',  # End of page
     'Bersambung ke halaman berikut',  # End of page
-    'SALDO AWAL :',  # End of document
+    LINESTART_FILE_END,  # End of document
 )
 
+# Part of the parse cache key, bump it when the parsed rows change
+PARSER_VERSION = '2'
+
 SETTLEMENT_MONTHS_MAP = {
     'JANUARI': 1,
     'FEBRUARI': 2,
@@ -39,15 +58,76 @@ SETTLEMENT_MONTHS_MAP = {
 }
 
 
-class PdfParsedRow(BaseModel):
+# The card number may be anywhere in the line
+LINE_DISPATCHER = LineDispatcher({
+    'settlement_date': REGEX_SETTLEMENT_DATE,
+    'card_number': rf'.*?{REGEX_CARD_NUMBER}',
+    'transaction_start': REGEX_TRANSACTION_START,
+})
+VALIDATION_PATTERN = re.compile(REGEX_TRANSACTION_VALIDATION)
+DECIMALS_PATTERN = re.compile(r'\d{1,2}')
+BALANCE_REVERSED_PATTERN = re.compile(REGEX_TRANSACTION_BALANCE_REVERSED)
+
+
+class PdfParsedRow(ParsedRow):
+    card_number: str
+    transaction_date: date
+    settlement_date: date
+    amount_cents: int
+    description: str
+    order: int
+
+
+class PdfParsedRowFields(NamedTuple):
     card_number: str
     transaction_date: date
     settlement_date: date
-    amount: float
+    amount_cents: int
     description: str
     order: int
 
 
+# A NamedTuple can't have other bases, the amount view is mixed into a subclass
+class PdfParsedRowTuple(PdfParsedRowFields, AmountView):
+    __slots__ = ()
+
+
+def find_amount(description: str) -> str | None:
+    """
+    First amount of the description, (?<!\\d)\\d{1,3}(?:,\\d{3})*\\.\\d{1,2}(?: DB)?, or None.
+    Same as searching the regex, which backtracks quadratically over long runs of digit groups, in linear time.
+    """
+
+    pos = 0
+    while match := NUMBER_START_PATTERN.search(description, pos):
+        start = match.start()
+        if (end := find_number_end(description, start, ',')) == -1:
+            pos = start + 1
+            continue
+
+        if description.startswith('.', end) and (decimals := DECIMALS_PATTERN.match(description, end + 1)):
+            end = decimals.end()
+            if description.startswith(AMOUNT_SUFFIX_DB, end):
+                end += len(AMOUNT_SUFFIX_DB)
+            return description[start:end]
+
+        # Any number starting within this one runs into the same missing decimals
+        pos = end
+
+    return None
+
+
+def remove_balance(description: str) -> str:
+    """
+    Remove the ending balance, matched against the reversed description instead of trying every start of the number.
+    """
+
+    if (start := rmatch_start(BALANCE_REVERSED_PATTERN, description)) == -1:
+        return description
+
+    return description[:start]
+
+
 def get_description_and_amount_from_descriptions(descriptions: list[str]) -> str:
     """
     Known bugs:
@@ -60,21 +140,19 @@ def get_description_and_amount_from_descriptions(descriptions: list[str]) -> str
 
     description = ' '.join(descriptions)
 
-    if match_amount := re.search(REGEX_TRANSACTION_AMOUNT, description):
-        amount = match_amount.group(0)
-
+    if amount := find_amount(description):
         # The amount is always at the first or last line of descriptions
         # Remove the amount
         descriptions[0] = descriptions[0].replace(amount, '')
         descriptions[-1] = descriptions[-1].replace(amount, '')
         # Remove the ending balance if exists
-        descriptions[0] = re.sub(REGEX_TRANSACTION_BALANCE, '', descriptions[0])
-        descriptions[-1] = re.sub(REGEX_TRANSACTION_BALANCE, '', descriptions[-1])
+        descriptions[0] = remove_balance(descriptions[0])
+        descriptions[-1] = remove_balance(descriptions[-1])
 
         # # The amount and ending transaction balance can be anywhere in the descriptions
         # for i in range(len(descriptions)):
         #     descriptions[i] = descriptions[i].replace(amount, '')
-        #     descriptions[i] = re.sub(REGEX_TRANSACTION_BALANCE, '', descriptions[i])
+        #     descriptions[i] = remove_balance(descriptions[i])
     else:
         raise Exception(f'Amount not detected in descriptions: {descriptions}')
 
@@ -85,41 +163,110 @@ def get_description_and_amount_from_descriptions(descriptions: list[str]) -> str
     return final_description, amount
 
 
-def parse(pdf: PdfReader) -> list[PdfParsedRow]:
-    # Part 1: extract raw data without modifications
-    data: list[dict] = []
-    validation_transaction_count = 0
+def get_amount(amount: str) -> int:
+    if amount.endswith(' DB'):
+        return -get_cents(amount.removesuffix(' DB'), ',', '.')
+    else:
+        return get_cents(amount, ',', '.')
+
+
+@functools.lru_cache(maxsize=128)
+def get_dates(year: int) -> dict[str, date]:
+    """
+    Every transaction date text of a year, built once per year. The returned table is shared, never modify it.
+    """
+
+    dates = {}
+    for month in range(1, 13):
+        for day in range(1, 32):
+            try:
+                dates[f'{day:02d}/{month:02d}'] = date(year, month, day)
+            except ValueError:
+                # Past the end of the month
+                break
+
+    return dates
+
+
+def get_settlement_date(text: str) -> date:
+    try:
+        month, year = text.split(' ')
+        return date(int(year), SETTLEMENT_MONTHS_MAP[month], 1)
+    except (KeyError, ValueError):
+        raise Exception(f'Invalid settlement date: {text}') from None
+
+
+def format_record(card_number: str, transaction_date: date, settlement_date: date, descriptions: list[str], order: int) -> tuple:
+    description, amount = get_description_and_amount_from_descriptions(descriptions)
 
-    q = Queue()
-    lines = '\n'.join([page.extract_text() for page in pdf.pages])
-    [q.put(line) for line in lines.split('\n')]
+    return (card_number, transaction_date, settlement_date, get_amount(amount), description, order)
+
+
+def report_format_record(reporter: DiagnosticReporter, transaction: tuple, order: int, line_number: int, line: str) -> tuple | None:
+    # The transaction is reported with its first line
+    try:
+        return format_record(*transaction, order)
+    except Exception as e:
+        reporter.report('invalid_transaction', str(e), line_number, line)
+        return None
+
+
+def iter_records(
+    pdf: str | bytes | memoryview | PdfReader | TextSource,
+    stats: ParseStats | None = None,
+    diagnostics: list[Diagnostic] | None = None,
+    extract_workers: int | None = None,
+) -> Iterator[tuple]:
+    """
+    Stream the parsed records as tuples in the field order of PdfParsedRow.
+    Pages are extracted one at a time and each record is yielded as soon as its transaction is complete, no page after the end of document line is extracted.
+    The transaction count validation runs once the last page is consumed, after all records have been yielded.
+    Given a diagnostics list, a transaction which can't be parsed is reported into it and skipped instead of raising a ParseError.
+    With extract_workers, the pages of a path or bytes are extracted ahead by that many worker processes, see ParallelTextSource.
+    """
+
+    order = 0
+    validation_transaction_count = 0
 
     # Main data
     settlement_date = None
     card_number = None
+    # Lines are only counted per classification when collecting stats
+    match_line = LINE_DISPATCHER.match if stats is None else stats.count_lines(LINE_DISPATCHER.match)
     # Aux
     beginning_of_file = True
-    datum = {}
-    while not q.empty():
-        line = q.get()
-        if not line:
+    dates: dict[str, date] = {}
+    # The transaction being read, its description lines are only known once the next transaction begins
+    transaction = None
+    transaction_line = (0, '')
+    reporter = DiagnosticReporter(diagnostics)
+    for line_number, raw_line in enumerate(iter_pdf_lines(pdf, stats, reporter.page_starts, extract_workers), 1):
+        if not raw_line:
             continue
 
-        line = clean_line(line)
+        # Diagnostics keep the line as extracted
+        line = clean_line(raw_line)
 
         # Validation: add line to validation sets
-        if re.match(REGEX_TRANSACTION_VALIDATION, line):
+        if VALIDATION_PATTERN.match(line):
             validation_transaction_count += 1
 
+        kind, groups = match_line(line)
+
         # Get settlement date
-        if match_settlement_date := re.match(REGEX_SETTLEMENT_DATE, line):
-            month, year = match_settlement_date.group(1).split(' ')
-            settlement_date = datetime(int(year), SETTLEMENT_MONTHS_MAP[month], 1).date()
+        if kind == 'settlement_date':
+            try:
+                settlement_date = get_settlement_date(groups[0])
+            except Exception as e:
+                reporter.report('invalid_settlement_date', str(e), line_number, raw_line)
+                continue
+
+            dates = get_dates(settlement_date.year)
             continue
 
         # Detect a card number line, the beginning of statements
-        if match_card_number := re.search(REGEX_CARD_NUMBER, line):
-            card_number, = match_card_number.groups()
+        if kind == 'card_number':
+            card_number = sys.intern(groups[0])
             beginning_of_file = False
             continue
         # For optimization, skip the line if it's the beginning of the file because it's not corelated to any transaction
@@ -128,63 +275,78 @@ def parse(pdf: PdfReader) -> list[PdfParsedRow]:
 
         if line.startswith(LINESTART_TRANSACTION_END):
             # Pop data if exists
-            if datum:
-                datum['description'], datum['amount'] = get_description_and_amount_from_descriptions(datum['description'])
-                data.append(datum)
-                datum = {}
+            if transaction:
+                if (record := report_format_record(reporter, transaction, order, *transaction_line)) is not None:
+                    yield record
+                order += 1
+                transaction = None
+
+            # End of document, the pages after it are never extracted
+            if line.startswith(LINESTART_FILE_END):
+                break
 
         # Get a beginning of transaction
-        if match_transaction := re.match(REGEX_TRANSACTION_START, line):
+        if kind == 'transaction_start':
             # Pop data if exists
-            if datum:
-                datum['description'], datum['amount'] = get_description_and_amount_from_descriptions(datum['description'])
-                data.append(datum)
-                datum = {}
+            if transaction:
+                if (record := report_format_record(reporter, transaction, order, *transaction_line)) is not None:
+                    yield record
+                order += 1
 
             # Start of a new transaction
-            transaction_date, rest = match_transaction.groups()
-
-            datum['settlement_date'] = settlement_date
-            datum['transaction_date'] = transaction_date
-            datum['card_number'] = card_number
-            datum['description'] = [rest]
+            transaction_date, rest = groups
+            transaction_line = (line_number, raw_line)
+            try:
+                transaction = (card_number, get_date(transaction_date, dates), settlement_date, [rest])
+            except Exception as e:
+                reporter.report('invalid_date', str(e), line_number, raw_line)
+                # The skipped transaction keeps its order, its description lines are dropped
+                transaction = None
+                order += 1
 
         # Else this is a multi-line transaction
-        elif 'description' in datum:
+        elif transaction:
             if line == '':
-                if datum:
-                    datum['description'], datum['amount'] = get_description_and_amount_from_descriptions(datum['description'])
-                    data.append(datum)
-                    datum = {}
-                    continue
-
-            datum['description'].append(line)
-
-    # Validate the transaction count
-    if len(data) != validation_transaction_count:
-        raise Exception(f'Validation failed: {len(data)} != {validation_transaction_count}')
-
-    # Part 2: data & cleansing
-    for i, datum in enumerate(data):
-        # Amount
-        if datum['amount'].endswith(' DB'):
-            datum['amount'] = -float(datum['amount'].removesuffix(' DB').replace(',', ''))
-        else:
-            datum['amount'] = float(datum['amount'].replace(',', ''))
-
-        # Transaction date
-        day, month = datum['transaction_date'].split('/')
-        year = datum['settlement_date'].year
-        transaction_date = datetime(year, int(month), int(day))
-        datum['transaction_date'] = transaction_date
-
-        datum['order'] = i
-
-    return [PdfParsedRow(
-        card_number=datum['card_number'],
-        transaction_date=datum['transaction_date'],
-        settlement_date=datum['settlement_date'],
-        amount=datum['amount'],
-        description=datum['description'],
-        order=datum['order'],
-    ) for datum in data]
+                if (record := report_format_record(reporter, transaction, order, *transaction_line)) is not None:
+                    yield record
+                order += 1
+                transaction = None
+                continue
+
+            transaction[3].append(line)
+
+    # Validate the transaction count, skipped transactions included
+    if order != validation_transaction_count:
+        reporter.report('transaction_count', f'Validation failed: {order} != {validation_transaction_count}')
+
+
+def iter_parse(
+    pdf: str | bytes | memoryview | PdfReader | TextSource,
+    trusted: bool = False,
+    row_type: Callable | None = None,
+    stats: ParseStats | None = None,
+    strict: bool = True,
+    diagnostics: list[Diagnostic] | None = None,
+    extract_workers: int | None = None,
+) -> Iterator[PdfParsedRow]:
+    """
+    With strict=False, a transaction which can't be parsed is skipped and reported into diagnostics instead of raising a ParseError.
+    With extract_workers, the pages of a path or bytes are extracted by that many worker processes for very large statements.
+    """
+
+    if not strict and diagnostics is None:
+        diagnostics = []
+    records = iter_records(pdf, stats, None if strict else diagnostics, extract_workers)
+    yield from iter_rows(PdfParsedRow, records, trusted, row_type, stats)
+
+
+def parse(
+    pdf: str | bytes | memoryview | PdfReader | TextSource,
+    trusted: bool = False,
+    row_type: Callable | None = None,
+    stats: ParseStats | None = None,
+    strict: bool = True,
+    diagnostics: list[Diagnostic] | None = None,
+    extract_workers: int | None = None,
+) -> list[PdfParsedRow]:
+    return list(iter_parse(pdf, trusted, row_type, stats, strict, diagnostics, extract_workers))
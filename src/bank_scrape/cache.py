@@ -0,0 +1,98 @@
+import hashlib
+import sqlite3
+import time
+import zlib
+
+from pydantic import TypeAdapter
+from typing import Any
+
+from .parsers import get_parser
+from .utils.common import open_pdf
+
+
+class ParseCache:
+    """
+    Content-addressed on-disk cache of parsed rows, stored in a SQLite database.
+
+    Entries are keyed by the SHA-256 of the PDF bytes and the parser version, a hit returns the rows without decrypting or reading the PDF.
+    Once the stored rows exceed max_size bytes, the least recently used entries are evicted.
+    """
+
+    def __init__(self, path: str, max_size: int = 1 << 30) -> None:
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.db = sqlite3.connect(path)
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS parse_cache (
+                digest TEXT NOT NULL,
+                parser TEXT NOT NULL,
+                rows BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (digest, parser)
+            )
+        ''')
+        self.db.execute('CREATE INDEX IF NOT EXISTS parse_cache_accessed_at ON parse_cache (accessed_at)')
+        self.db.commit()
+
+    def __enter__(self) -> 'ParseCache':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.db.close()
+
+    def parse(self, file: str | bytes, password: str | None, bank: str) -> list[Any]:
+        if isinstance(file, str):
+            with open(file, 'rb') as f:
+                file = f.read()
+
+        parser = get_parser(bank)
+        adapter = TypeAdapter(list[parser.PdfParsedRow])
+        digest = hashlib.sha256(file).hexdigest()
+        parser_tag = f'{bank}:{parser.PARSER_VERSION}'
+
+        if (data := self.get(digest, parser_tag)) is not None:
+            return adapter.validate_json(data)
+
+        rows = parser.parse(open_pdf(file, password))
+        self.put(digest, parser_tag, adapter.dump_json(rows))
+
+        return rows
+
+    def get(self, digest: str, parser_tag: str) -> bytes | None:
+        record = self.db.execute('SELECT rows FROM parse_cache WHERE digest = ? AND parser = ?', (digest, parser_tag)).fetchone()
+        if record is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.db.execute('UPDATE parse_cache SET accessed_at = ? WHERE digest = ? AND parser = ?', (time.time(), digest, parser_tag))
+        self.db.commit()
+
+        return zlib.decompress(record[0])
+
+    def put(self, digest: str, parser_tag: str, data: bytes) -> None:
+        data = zlib.compress(data)
+        self.db.execute('INSERT OR REPLACE INTO parse_cache VALUES (?, ?, ?, ?, ?)', (digest, parser_tag, data, len(data), time.time()))
+        self.evict()
+        self.db.commit()
+
+    def evict(self) -> None:
+        size, = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM parse_cache').fetchone()
+        if size <= self.max_size:
+            return
+
+        # Least recently used first
+        for digest, parser_tag, entry_size in self.db.execute('SELECT digest, parser, size FROM parse_cache ORDER BY accessed_at').fetchall():
+            if size <= self.max_size:
+                break
+
+            self.db.execute('DELETE FROM parse_cache WHERE digest = ? AND parser = ?', (digest, parser_tag))
+            size -= entry_size
+            self.evictions += 1
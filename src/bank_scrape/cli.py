@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import sys
+
+from typing import TYPE_CHECKING, Any, TextIO
+
+from .parsers import PARSERS, get_parser
+
+# Only used in annotations, --help and argument errors never import pydantic nor PyPDF2
+if TYPE_CHECKING:
+    from pydantic import BaseModel
+
+# Short names accepted on the command line
+BANK_ALIASES = {
+    'jenius': 'jenius-credit',
+}
+
+FORMATS = ('csv', 'jsonl', 'parquet')
+
+
+def get_fields(bank: str) -> list[str]:
+    # Detected formats are written into the same output, use the columns of all of them
+    banks = PARSERS if bank == 'auto' else [bank]
+    fields = {}
+    for x in banks:
+        row_type = get_parser(x).PdfParsedRow
+        fields.update(dict.fromkeys(row_type.model_fields))
+        fields.update(dict.fromkeys(row_type.model_computed_fields))
+
+    return list(fields)
+
+
+class CsvWriter:
+
+    def __init__(self, output: TextIO, fields: list[str], header: bool = True) -> None:
+        self.writer = csv.DictWriter(output, fields)
+        if header:
+            self.writer.writeheader()
+
+    def write(self, rows: list[BaseModel]) -> None:
+        self.writer.writerows(row.model_dump() for row in rows)
+
+    def close(self) -> None:
+        pass
+
+
+class JsonlWriter:
+
+    def __init__(self, output: TextIO) -> None:
+        self.output = output
+
+    def write(self, rows: list[BaseModel]) -> None:
+        self.output.writelines(f'{row.model_dump_json()}\n' for row in rows)
+
+    def close(self) -> None:
+        pass
+
+
+class ParquetWriter:
+    """
+    The Parquet schema is the one of the first statement, all statements must be of the same format.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.sink = None
+
+    def write(self, rows: list[BaseModel]) -> None:
+        from .columnar import ColumnarStatement, ParquetSink
+
+        if not rows:
+            return
+
+        row_type = type(rows[0])
+        if self.sink is None:
+            self.sink = ParquetSink(self.path, row_type)
+
+        fields = tuple(row_type.model_fields)
+        self.sink.write(ColumnarStatement(row_type).extend(tuple(getattr(row, field) for field in fields) for row in rows))
+
+    def close(self) -> None:
+        if self.sink is not None:
+            self.sink.close()
+
+
+def read_passwords(path: str | None) -> list[str] | None:
+    # One password per line
+    if path is None:
+        return None
+
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def get_writer(format: str, output: TextIO | None, output_path: str | None, bank: str) -> Any:
+    if format == 'csv':
+        return CsvWriter(output, get_fields(bank))
+    elif format == 'jsonl':
+        return JsonlWriter(output)
+    else:
+        return ParquetWriter(output_path)
+
+
+def parse(args: argparse.Namespace) -> int:
+    """
+    Parse the files in a process pool, writing the rows of each file in the given order as soon as it's done.
+    Files which fail are reported on stderr and skipped, the exit code is 1 if any file failed.
+    With --no-strict, the transactions which can't be parsed are skipped as well and the clean rows of the file are still written.
+    """
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    from .batch import parse_file_result
+
+    bank = BANK_ALIASES.get(args.bank, args.bank)
+    passwords = read_passwords(args.password_file)
+
+    if args.format == 'parquet' and args.output == '-':
+        print('Parquet output requires --output', file=sys.stderr)
+        return 2
+
+    # Parquet is written by pyarrow into the path itself
+    output = None
+    if args.format != 'parquet':
+        output = sys.stdout if args.output == '-' else open(args.output, 'w', newline='')
+
+    failed_files = []
+    writer = get_writer(args.format, output, args.output, bank)
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            futures = [executor.submit(parse_file_result, file, passwords, bank, args.strict, args.extract_workers) for file in args.files]
+            for file, future in zip(args.files, futures):
+                try:
+                    result = future.result()
+                    writer.write(result.rows)
+                except OSError as e:
+                    # Failing to write the output stops everything, unlike a file which can't be read
+                    if e.filename != file:
+                        raise
+                    failed_files.append(file)
+                    print(f'{file}: {e}', file=sys.stderr)
+                    continue
+                except Exception as e:
+                    failed_files.append(file)
+                    print(f'{file}: {e}', file=sys.stderr)
+                    continue
+
+                # One JSON diagnostic per line
+                for diagnostic in result.diagnostics:
+                    print(diagnostic.model_dump_json(), file=sys.stderr)
+                if result.failed:
+                    failed_files.append(file)
+
+                if output is not None:
+                    output.flush()
+    finally:
+        writer.close()
+        if output is not None and output is not sys.stdout:
+            output.close()
+
+    if args.failed_files is not None:
+        with open(args.failed_files, 'w') as f:
+            f.writelines(f'{file}\n' for file in failed_files)
+
+    if failed_files:
+        print(f'{len(failed_files)} of {len(args.files)} files failed', file=sys.stderr)
+        return 1
+
+    return 0
+
+
+def watch(args: argparse.Namespace) -> int:
+    """
+    Ingest the new or changed files of a folder until interrupted, appending the rows of each file to the output as soon as it's done.
+    A manifest in the folder records the files already ingested, so a restart only parses what arrived or changed since.
+    """
+
+    from .watch import FolderWatcher, Manifest
+
+    bank = BANK_ALIASES.get(args.bank, args.bank)
+    passwords = read_passwords(args.password_file)
+
+    # Appended, a restart continues the same output. The CSV header is only written into an empty file
+    output = sys.stdout if args.output == '-' else open(args.output, 'a', newline='')
+    if args.format == 'csv':
+        writer = CsvWriter(output, get_fields(bank), header=output is sys.stdout or output.tell() == 0)
+    else:
+        writer = JsonlWriter(output)
+
+    failed_files = 0
+    manifest = Manifest(args.manifest or os.path.join(args.directory, '.bank-scrape-manifest.db'))
+    try:
+        watcher = FolderWatcher(args.directory, manifest, passwords, bank, args.strict, args.workers, settle_seconds=args.settle, interval=args.interval)
+        for result in watcher.iter_results(once=args.once):
+            writer.write(result.rows)
+            output.flush()
+
+            # One JSON diagnostic per line
+            for diagnostic in result.diagnostics:
+                print(diagnostic.model_dump_json(), file=sys.stderr)
+            if result.unchanged:
+                print(f'{result.file}: unchanged', file=sys.stderr)
+            else:
+                print(f'{result.file}: {len(result.rows)} rows{", failed" if result.failed else ""}', file=sys.stderr)
+            if result.failed:
+                failed_files += 1
+    except KeyboardInterrupt:
+        # The files being parsed are picked up again on the next start
+        pass
+    finally:
+        manifest.close()
+        writer.close()
+        if output is not sys.stdout:
+            output.close()
+
+    return 1 if args.once and failed_files else 0
+
+
+def get_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='bank-scrape', description='Parse bank statement PDFs')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    parse_parser = subparsers.add_parser('parse', help='parse statements into csv, jsonl or parquet')
+    parse_parser.add_argument('files', nargs='+')
+    parse_parser.add_argument('--bank', choices=['auto', 'bca-credit', 'bca-debit', 'jenius'], default='auto')
+    parse_parser.add_argument('--password-file', help='file with one candidate password per line')
+    parse_parser.add_argument('--workers', type=int, default=None, help='number of worker processes, defaults to the number of CPUs')
+    parse_parser.add_argument('--extract-workers', type=int, default=None, help='worker processes extracting the pages of each file, for a few very large statements')
+    parse_parser.add_argument('--format', choices=FORMATS, default='csv')
+    parse_parser.add_argument('--output', default='-', help='output file, defaults to stdout')
+    parse_parser.add_argument('--no-strict', dest='strict', action='store_false', help='skip the transactions which can\'t be parsed instead of failing the whole file')
+    parse_parser.add_argument('--failed-files', help='write the failed files into this file, one per line, to parse them again later')
+    parse_parser.set_defaults(handler=parse)
+
+    watch_parser = subparsers.add_parser('watch', help='keep parsing the new or changed statements of a folder')
+    watch_parser.add_argument('directory')
+    watch_parser.add_argument('--bank', choices=['auto', 'bca-credit', 'bca-debit', 'jenius'], default='auto')
+    watch_parser.add_argument('--password-file', help='file with one candidate password per line')
+    watch_parser.add_argument('--workers', type=int, default=None, help='number of worker processes, defaults to the number of CPUs')
+    # A Parquet file can't be appended to once closed
+    watch_parser.add_argument('--format', choices=('csv', 'jsonl'), default='csv')
+    watch_parser.add_argument('--output', default='-', help='output file the rows are appended to, defaults to stdout')
+    watch_parser.add_argument('--manifest', help='manifest of the ingested files, defaults to .bank-scrape-manifest.db in the folder')
+    watch_parser.add_argument('--interval', type=float, default=1.0, help='seconds between two scans of the folder')
+    watch_parser.add_argument('--settle', type=float, default=2.0, help='seconds a file must stay unchanged before being parsed')
+    watch_parser.add_argument('--once', action='store_true', help='exit once the files already in the folder are ingested')
+    watch_parser.add_argument('--no-strict', dest='strict', action='store_false', help='skip the transactions which can\'t be parsed instead of failing the whole file')
+    watch_parser.set_defaults(handler=watch)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = get_argument_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except BrokenPipeError:
+        # The reader of stdout exited early (e.g. head), silence the flush at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+from array import array
+from datetime import date, timedelta
+from itertools import islice
+from pydantic import BaseModel
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, Iterable
+
+from .parsers import detect_parser, get_parser
+from .sources import TextSource, open_text_source
+
+# Only used in annotations
+if TYPE_CHECKING:
+    from PyPDF2 import PdfReader
+
+# Repeated on every row, stored once per statement and referenced by index
+DICTIONARY_FIELDS = ('card_number', 'owner')
+
+# Records converted at once by extend(), few enough to keep the memory of a streamed statement flat
+EXTEND_CHUNK_ROWS = 4096
+
+EPOCH = date(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+
+
+def import_pyarrow() -> ModuleType:
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError('pyarrow is required for the columnar output, install rdxz2-bank-scrape[columnar]') from e
+
+    return pyarrow
+
+
+class ColumnarStatement:
+    """
+    Parsed rows accumulated into typed columns instead of one pydantic model per row.
+
+    - Dates are stored as days since epoch (datetime64[D] / date32)
+    - Amounts are stored as int64 cents
+    - Card numbers and owners are dictionary-encoded
+    """
+
+    def __init__(self, row_type: type[BaseModel]) -> None:
+        self.row_type = row_type
+        self.length = 0
+
+        self.columns: dict[str, array | list] = {}
+        self.dictionaries: dict[str, dict[str, int]] = {}
+        for field, info in row_type.model_fields.items():
+            if field in DICTIONARY_FIELDS:
+                self.columns[field] = array('i')
+                self.dictionaries[field] = {}
+            elif info.annotation is date:
+                self.columns[field] = array('i')
+            elif info.annotation is int:
+                self.columns[field] = array('q')
+            else:
+                self.columns[field] = []
+
+    def __len__(self) -> int:
+        return self.length
+
+    def append(self, record: tuple) -> None:
+        for (field, column), value in zip(self.columns.items(), record):
+            if field in self.dictionaries:
+                dictionary = self.dictionaries[field]
+                if (code := dictionary.get(value)) is None:
+                    code = dictionary[value] = len(dictionary)
+                column.append(code)
+            elif isinstance(value, date):
+                column.append(value.toordinal() - EPOCH_ORDINAL)
+            else:
+                column.append(value)
+
+        self.length += 1
+
+    def extend(self, records: Iterable[tuple]) -> 'ColumnarStatement':
+        """
+        Accumulate a stream of records, e.g. iter_records() of a parser, in chunks of EXTEND_CHUNK_ROWS so that only one chunk of tuples is held at once.
+        """
+
+        records = iter(records)
+        while chunk := list(islice(records, EXTEND_CHUNK_ROWS)):
+            self.extend_list(chunk)
+
+        return self
+
+    def extend_list(self, records: list[tuple]) -> 'ColumnarStatement':
+        """
+        Same as append() on every record, converting one column at a time by its annotation instead of checking the type of every value.
+        """
+
+        if not records:
+            return self
+
+        for (field, column), values in zip(self.columns.items(), zip(*records)):
+            if field in self.dictionaries:
+                dictionary = self.dictionaries[field]
+                # A new value gets the next code
+                column.extend([dictionary.setdefault(value, len(dictionary)) for value in values])
+            elif self.row_type.model_fields[field].annotation is date:
+                column.extend([value.toordinal() - EPOCH_ORDINAL for value in values])
+            else:
+                column.extend(values)
+
+        self.length += len(records)
+        return self
+
+    def to_arrow(self) -> Any:
+        pa = import_pyarrow()
+
+        arrays = {}
+        for field, info in self.row_type.model_fields.items():
+            column = self.columns[field]
+            if field in self.dictionaries:
+                arrays[field] = pa.DictionaryArray.from_arrays(
+                    pa.Array.from_buffers(pa.int32(), len(column), [None, pa.py_buffer(column)]),
+                    pa.array(list(self.dictionaries[field]), pa.string()),
+                )
+            elif info.annotation is date:
+                arrays[field] = pa.Array.from_buffers(pa.date32(), len(column), [None, pa.py_buffer(column)])
+            elif info.annotation is int:
+                arrays[field] = pa.Array.from_buffers(pa.int64(), len(column), [None, pa.py_buffer(column)])
+            else:
+                arrays[field] = pa.array(column, pa.string())
+
+        return pa.table(arrays, schema=get_arrow_schema(self.row_type))
+
+    def to_numpy(self) -> dict[str, Any]:
+        table = self.to_arrow()
+        return {name: column.to_numpy(zero_copy_only=False) for name, column in zip(table.column_names, table.columns)}
+
+    def to_rows(self) -> list[BaseModel]:
+        """
+        The rows as returned by parse(), built from the columns.
+        """
+
+        dictionaries = {field: list(dictionary) for field, dictionary in self.dictionaries.items()}
+        columns = {}
+        for field, info in self.row_type.model_fields.items():
+            column = self.columns[field]
+            if field in dictionaries:
+                columns[field] = [dictionaries[field][code] for code in column]
+            elif info.annotation is date:
+                columns[field] = [EPOCH + timedelta(days=days) for days in column]
+            else:
+                columns[field] = column
+
+        return [self.row_type(**dict(zip(columns, record))) for record in zip(*columns.values())]
+
+
+def get_arrow_schema(row_type: type[BaseModel]) -> Any:
+    pa = import_pyarrow()
+
+    fields = []
+    for field, info in row_type.model_fields.items():
+        if field in DICTIONARY_FIELDS:
+            fields.append(pa.field(field, pa.dictionary(pa.int32(), pa.string())))
+        elif info.annotation is date:
+            fields.append(pa.field(field, pa.date32()))
+        elif info.annotation is int:
+            fields.append(pa.field(field, pa.int64()))
+        else:
+            fields.append(pa.field(field, pa.string()))
+
+    return pa.schema(fields)
+
+
+def parse_columnar(pdf: str | bytes | memoryview | PdfReader | TextSource, bank: str = 'auto') -> ColumnarStatement:
+    # A source opened here out of a path is closed once parsed
+    with open_text_source(pdf) as source:
+        if bank == 'auto':
+            parser, source = detect_parser(source)
+        else:
+            parser = get_parser(bank)
+
+        return ColumnarStatement(parser.PdfParsedRow).extend(parser.iter_records(source))
+
+
+class ParquetSink:
+    """
+    Stream statements of the same format into a single Parquet file, one row group per statement.
+    """
+
+    def __init__(self, path: str, row_type: type[BaseModel]) -> None:
+        import_pyarrow()
+        import pyarrow.parquet as pq
+
+        self.row_type = row_type
+        self.writer = pq.ParquetWriter(path, get_arrow_schema(row_type))
+
+    def __enter__(self) -> 'ParquetSink':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def write(self, statement: ColumnarStatement) -> None:
+        if statement.row_type is not self.row_type:
+            raise Exception(f'Cannot write {statement.row_type.__module__} rows into a {self.row_type.__module__} Parquet file')
+
+        if len(statement):
+            self.writer.write_table(statement.to_arrow())
+
+    def close(self) -> None:
+        self.writer.close()
@@ -0,0 +1,134 @@
+import os
+import shutil
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from PyPDF2 import PasswordType, PdfReader, PdfWriter
+from typing import Iterable
+
+
+class PasswordResolver:
+    """
+    Candidate passwords which remember the one that worked for each filename prefix.
+    Statements of the same customer share the prefix (the part before the first '_'), so later files try the right password first.
+    """
+
+    def __init__(self, passwords: Iterable[str]) -> None:
+        self.passwords = list(passwords)
+        self.known: dict[str, str] = {}
+
+    @staticmethod
+    def get_prefix(file: str) -> str:
+        return os.path.basename(file).split('_')[0]
+
+    def candidates(self, file: str) -> list[str]:
+        if (password := self.known.get(self.get_prefix(file))) is None:
+            return self.passwords
+
+        return [password] + [x for x in self.passwords if x != password]
+
+    def remember(self, file: str, password: str) -> None:
+        self.known[self.get_prefix(file)] = password
+
+
+def decrypt_reader(pdf: PdfReader, passwords: Iterable[str]) -> str | None:
+    # Each wrong attempt pays the key derivation cost, so the order of the passwords matters
+    for password in passwords:
+        if pdf.decrypt(password) != PasswordType.NOT_DECRYPTED:
+            return password
+
+    return None
+
+
+def decrypt_file(file: str, passwords: list[str], out_file: str) -> str | None:
+    """
+    Write the decrypted file into out_file, returning the password which worked or None if the file isn't encrypted.
+    """
+
+    tmp_file = f'{out_file}.tmp'
+    with open(file, 'rb') as f:
+        pdf = PdfReader(f)
+
+        # Already unencrypted, copy it as is instead of rewriting it
+        if not pdf.is_encrypted:
+            shutil.copyfile(file, tmp_file)
+            os.replace(tmp_file, out_file)
+            return None
+
+        if (password := decrypt_reader(pdf, passwords)) is None:
+            raise Exception(f'None of the passwords can decrypt {file}')
+
+        pdf_writer = PdfWriter()
+        pdf_writer.append_pages_from_reader(pdf)
+        with open(tmp_file, 'wb') as f2:
+            pdf_writer.write(f2)
+
+    # Only expose the file once completely written, so an interrupted run never leaves a partial output behind
+    os.replace(tmp_file, out_file)
+
+    return password
+
+
+def decrypt_batch(
+    files: Iterable[str], passwords: Iterable[str] | PasswordResolver, out_dir: str, workers: int | None = None
+) -> tuple[dict[str, str], dict[str, str]]:
+    """
+    Decrypt files in a process pool into out_dir, skipping files which already have an output.
+
+    The first file of each filename prefix is decrypted on its own, once it succeeds (its password is known, or it isn't encrypted) the remaining files of the prefix are submitted at once, trying that password first.
+    A file which fails (e.g. none of the passwords work) doesn't stop the batch, the next file of its prefix is probed instead.
+    Returns the output file of each decrypted file, and the error of each failed file.
+    """
+
+    resolver = passwords if isinstance(passwords, PasswordResolver) else PasswordResolver(passwords)
+    os.makedirs(out_dir, exist_ok=True)
+
+    out_files: dict[str, str] = {}
+    failed_files: dict[str, str] = {}
+    queues: dict[str, deque[str]] = {}
+    for file in files:
+        out_file = os.path.join(out_dir, os.path.basename(file))
+        if os.path.exists(out_file):
+            continue
+
+        out_files[file] = out_file
+        queues.setdefault(resolver.get_prefix(file), deque()).append(file)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures: dict[Future, tuple[str, bool]] = {}
+
+        def submit(file: str, is_probe: bool) -> None:
+            futures[executor.submit(decrypt_file, file, resolver.candidates(file), out_files[file])] = (file, is_probe)
+
+        # Probe one file per prefix to find out the password
+        for queue in queues.values():
+            submit(queue.popleft(), True)
+
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                file, is_probe = futures.pop(future)
+                try:
+                    password = future.result()
+                except Exception as e:
+                    del out_files[file]
+                    failed_files[file] = str(e)
+                    failed = True
+                else:
+                    failed = False
+                    if password is not None:
+                        resolver.remember(file, password)
+
+                if not is_probe:
+                    continue
+
+                queue = queues[resolver.get_prefix(file)]
+                # The password is found or the file isn't encrypted, decrypt the rest of the prefix in parallel
+                if not failed:
+                    while queue:
+                        submit(queue.popleft(), False)
+                # The file failed, probe the next one
+                elif queue:
+                    submit(queue.popleft(), True)
+
+    return out_files, failed_files
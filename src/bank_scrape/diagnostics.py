@@ -0,0 +1,50 @@
+from bisect import bisect_right
+from pydantic import BaseModel
+
+
+class Diagnostic(BaseModel):
+    """
+    Why a transaction, or a whole file, couldn't be parsed. Page and line number are 1-based.
+    """
+
+    file: str | None = None
+    page: int | None = None
+    line_number: int | None = None
+    line: str | None = None
+    rule: str
+    message: str
+
+
+class ParseError(Exception):
+
+    def __init__(self, diagnostic: Diagnostic) -> None:
+        super().__init__(diagnostic.message)
+        self.diagnostic = diagnostic
+
+    def __reduce__(self) -> tuple:
+        # Raised in the worker processes, args only holds the message
+        return ParseError, (self.diagnostic,)
+
+
+class DiagnosticReporter:
+    """
+    Raise a ParseError on the first problem (strict), or collect the diagnostics into the given list and let the parser skip the transaction.
+
+    The parsers number the lines across all pages, page_starts holds the number of lines before each page to locate a line in its page.
+    """
+
+    def __init__(self, diagnostics: list[Diagnostic] | None = None) -> None:
+        self.diagnostics = diagnostics
+        self.page_starts: list[int] = []
+
+    def report(self, rule: str, message: str, line_number: int | None = None, line: str | None = None) -> None:
+        page = None
+        if line_number is not None and self.page_starts:
+            page = bisect_right(self.page_starts, line_number - 1)
+            line_number -= self.page_starts[page - 1]
+
+        diagnostic = Diagnostic(page=page, line_number=line_number, line=line, rule=rule, message=message)
+        if self.diagnostics is None:
+            raise ParseError(diagnostic)
+
+        self.diagnostics.append(diagnostic)
@@ -1,183 +1,300 @@
-# import pandas as pd
-# import re
-
-# from datetime import datetime, timedelta
-# from loguru import logger
-# from PyPDF2 import PdfReader
-# from queue import Queue
-
-# import util
-
-# REGEX_TRANSACTION_VALIDATION = r'^\d{1,2} [A-Z][a-z]{2} \d{4}\b$'
-# REGEX_TRANSACTION_START = r'^\d{1,2} [A-Z][a-z]{2} \d{4}\b$'
-# REGEX_TRANSACTION_AMOUNT = r'^\d{1,3}(,\d{3})*\.\d{2}$'
-
-# LINE_CARD_NUMBER = 'Nomor Kartu'
-# LINE_OWNER = 'Pemegang Kartu'
-# LINE_SETTLEMENT_DATE = 'Tanggal Cetak Tagihan'
-# LINE_CR = 'CR'
-# LINE_FILE_END = 'Pembayaran Tagihan'
-
-# TRANSACTION_MONTHS_MAP = {
-#     'Jan': 1,
-#     'Feb': 2,
-#     'Mar': 3,
-#     'Apr': 4,
-#     'Mei': 5,
-#     'Jun': 6,
-#     'Jul': 7,
-#     'Agt': 8,
-#     'Sep': 9,
-#     'Okt': 10,
-#     'Nov': 11,
-#     'Des': 12,
-# }
-
-# SETTLEMENT_MONTHS_MAP = {
-#     'Januari': 1,
-#     'Februari': 2,
-#     'Maret': 3,
-#     'April': 4,
-#     'Mei': 5,
-#     'Juni': 6,
-#     'Juli': 7,
-#     'Agustus': 8,
-#     'September': 9,
-#     'Oktober': 10,
-#     'November': 11,
-#     'Desember': 12,
-# }
-
-# PG_TABLE_NAME = 'public.stmt_bca_credit'
-# PG_COLS = {
-#     'settlement_date': 'DATE',
-#     'card_number': 'VARCHAR(19)',
-#     'owner': 'VARCHAR(255)',
-#     'transaction_date': 'DATE',
-#     'description': 'TEXT',
-#     'amount': 'DECIMAL',
-#     'order': 'SMALLINT',
-# }
-
-
-# def parse(files: list[str], password: str):
-
-#     if not files:
-#         raise Exception('No files to process')
-
-#     # Part 1: extract raw data without modifications
-#     all_data = []
-#     for file in files:
-#         logger.info(f'Processing {file}')
-#         data = []
-#         validation_transaction_count = 0
-
-#         lines = util.read_pdf_lines(file, password)
-#         q = util.EnumeratedQueue(lines)
-
-#         # Main data
-#         settlement_date = None
-#         card_number = None
-#         owner = None
-#         while not q.empty():
-#             line, i = q.get()
-#             line = util.clean_line(line)
-
-#             if not line:
-#                 continue
-
-#             # End of file
-#             if line == LINE_FILE_END:
-#                 break
-
-#             # Validation: add line to validation sets
-#             if re.match(REGEX_TRANSACTION_VALIDATION, line):
-#                 validation_transaction_count += 1
-
-#             # Get settlement date
-#             if line == LINE_SETTLEMENT_DATE:
-#                 settlement_date = util.clean_line(q.get()[0])
-#                 day, month, year = settlement_date.split(' ')
-#                 settlement_date = datetime(int(year), SETTLEMENT_MONTHS_MAP[month], int(day)).date()
-#                 continue
-
-#             # Get card number
-#             if line == LINE_CARD_NUMBER:
-#                 card_number = util.clean_line(q.get()[0])
-#                 continue
-
-#             # Get owner
-#             if line == LINE_OWNER:
-#                 owner = util.clean_line(q.get()[0])
-#                 continue
-
-#             if match_transaction_start := re.match(REGEX_TRANSACTION_START, line):
-#                 transaction_date = match_transaction_start.group(0)
-
-#                 # Directly get the transaction date
-#                 tranasction_settlement_date = util.clean_line(q.get()[0])
-
-#                 # Get description
-#                 descriptions = []
-#                 while True:
-#                     line, i = q.get()
-#                     line = util.clean_line(line)
-
-#                     # Get until an amount is found
-#                     if match_amount := re.match(REGEX_TRANSACTION_AMOUNT, line):
-#                         amount = match_amount.group(0)
-
-#                         # Detect CR transaction, which also the end of a transaction
-#                         next_line = util.clean_line(lines[i + 1])
-#                         if next_line == LINE_CR:
-#                             amount = f'{amount} CR'
-
-#                         break
-
-#                     descriptions.append(line)
-
-#                 data.append({
-#                     'settlement_date': settlement_date,
-#                     'card_number': card_number,
-#                     'owner': owner,
-#                     'transaction_date': transaction_date,
-#                     'description': ' '.join(descriptions),
-#                     'amount': amount,
-#                     'order': i,
-#                 })
-
-#         # Validate the transaction count
-#         if len(data) != validation_transaction_count:
-#             raise Exception(f'Validation failed: {len(data)} != {validation_transaction_count}')
-
-#         # Validate each rows
-#         pg_cols_set = set(PG_COLS.keys())
-#         for datum in data:
-#             missing_cols = pg_cols_set - set(datum.keys())
-#             if missing_cols:
-#                 raise Exception(f'Columns {missing_cols} not found: {datum}')
-#             if datum['settlement_date'] is None:
-#                 raise Exception(f'Settlement date not found: {datum}')
-#             if datum['card_number'] is None:
-#                 raise Exception(f'Card number not found: {datum}')
-
-#         all_data.extend(data)
-
-#     # Part 2: data formatting
-#     for datum in all_data:
-#         # Amount
-#         if datum['amount'].endswith(' CR'):
-#             datum['amount'] = float(datum['amount'].removesuffix(' CR').replace(',', ''))
-#         else:
-#             datum['amount'] = -float(datum['amount'].replace(',', ''))
-
-#         # Transaction date
-#         # Handle year transition
-#         day, month, year = datum['transaction_date'].split(' ')
-#         transaction_date = datetime(int(year), TRANSACTION_MONTHS_MAP[month], int(day)).date()
-#         datum['transaction_date'] = transaction_date
-
-#     # Part 3: data cleansing
-#     df = pd.DataFrame(all_data)[PG_COLS.keys()]
-
-#     return df, PG_COLS
+from __future__ import annotations
+
+import re
+import sys
+
+from datetime import date
+from typing import TYPE_CHECKING, Callable, Iterator, NamedTuple
+
+from .diagnostics import Diagnostic, DiagnosticReporter
+from .sources import TextSource
+from .utils.common import clean_line, get_cents, iter_pdf_lines, iter_rows
+from .utils.lines import LineCursor, LineDispatcher
+from .utils.rows import AmountView, ParsedRow
+
+# Only used in annotations, PyPDF2 is imported once a pdf is actually read
+if TYPE_CHECKING:
+    from PyPDF2 import PdfReader
+
+    from .stats import ParseStats
+
+REGEX_TRANSACTION_VALIDATION = r'^\d{1,2} [A-Z][a-z]{2} \d{4}\b$'
+REGEX_TRANSACTION_START = r'^\d{1,2} [A-Z][a-z]{2} \d{4}\b$'
+REGEX_TRANSACTION_AMOUNT = r'^\d{1,3}(,\d{3})*\.\d{2}$'
+
+LINE_CARD_NUMBER = 'Nomor Kartu'
+LINE_OWNER = 'Pemegang Kartu'
+LINE_SETTLEMENT_DATE = 'Tanggal Cetak Tagihan'
+LINE_CR = 'CR'
+LINE_FILE_END = 'Pembayaran Tagihan'
+
+# Part of the parse cache key, bump it when the parsed rows change
+PARSER_VERSION = '2'
+
+TRANSACTION_MONTHS_MAP = {
+    'Jan': 1,
+    'Feb': 2,
+    'Mar': 3,
+    'Apr': 4,
+    'Mei': 5,
+    'Jun': 6,
+    'Jul': 7,
+    'Agt': 8,
+    'Sep': 9,
+    'Okt': 10,
+    'Nov': 11,
+    'Des': 12,
+}
+
+SETTLEMENT_MONTHS_MAP = {
+    'Januari': 1,
+    'Februari': 2,
+    'Maret': 3,
+    'April': 4,
+    'Mei': 5,
+    'Juni': 6,
+    'Juli': 7,
+    'Agustus': 8,
+    'September': 9,
+    'Oktober': 10,
+    'November': 11,
+    'Desember': 12,
+}
+
+# The value of a labeled field is on the line after its label
+LINE_DISPATCHER = LineDispatcher({
+    'file_end': rf'{re.escape(LINE_FILE_END)}$',
+    'settlement_date': rf'{re.escape(LINE_SETTLEMENT_DATE)}$',
+    'card_number': rf'{re.escape(LINE_CARD_NUMBER)}$',
+    'owner': rf'{re.escape(LINE_OWNER)}$',
+    'transaction_start': REGEX_TRANSACTION_START,
+})
+VALIDATION_PATTERN = re.compile(REGEX_TRANSACTION_VALIDATION)
+TRANSACTION_START_PATTERN = re.compile(REGEX_TRANSACTION_START)
+AMOUNT_PATTERN = re.compile(REGEX_TRANSACTION_AMOUNT)
+
+
+class PdfParsedRow(ParsedRow):
+    card_number: str
+    owner: str
+    transaction_date: date
+    settlement_date: date
+    amount_cents: int
+    description: str
+    order: int
+
+
+class PdfParsedRowFields(NamedTuple):
+    card_number: str
+    owner: str
+    transaction_date: date
+    settlement_date: date
+    amount_cents: int
+    description: str
+    order: int
+
+
+# A NamedTuple can't have other bases, the amount view is mixed into a subclass
+class PdfParsedRowTuple(PdfParsedRowFields, AmountView):
+    __slots__ = ()
+
+
+def get_amount(amount: str) -> int:
+    if amount.endswith(' CR'):
+        return get_cents(amount.removesuffix(' CR'), ',', '.')
+    else:
+        return -get_cents(amount, ',', '.')
+
+
+def get_settlement_date(text: str) -> date:
+    try:
+        day, month, year = text.split(' ')
+        return date(int(year), SETTLEMENT_MONTHS_MAP[month], int(day))
+    except (KeyError, ValueError):
+        raise Exception(f'Invalid settlement date: {text}') from None
+
+
+def get_date(text: str, dates: dict[str, date]) -> date:
+    # The same dates repeat across the rows of a statement, only resolve each of them once
+    if (value := dates.get(text)) is None:
+        day, month, year = text.split(' ')
+        value = dates[text] = date(int(year), TRANSACTION_MONTHS_MAP[month], int(day))
+
+    return value
+
+
+def read_line(cursor: LineCursor, count_line: Callable[[str], None] | None, kind: str) -> str:
+    # Lines read past the dispatcher are counted under the kind of value they hold
+    raw_line = next(cursor, '')
+    if count_line is not None and raw_line.strip():
+        count_line(kind)
+
+    return raw_line
+
+
+def iter_records(
+    pdf: str | bytes | memoryview | PdfReader | TextSource,
+    stats: ParseStats | None = None,
+    diagnostics: list[Diagnostic] | None = None,
+    extract_workers: int | None = None,
+) -> Iterator[tuple]:
+    """
+    Stream the parsed records as tuples in the field order of PdfParsedRow.
+    Lines are read through a cursor which only looks one line ahead for the CR suffix, and no page after the end of file line is extracted.
+    Given a diagnostics list, a transaction which can't be parsed is reported into it and skipped instead of raising a ParseError.
+    With extract_workers, the pages of a path or bytes are extracted ahead by that many worker processes, see ParallelTextSource.
+    """
+
+    order = 0
+    validation_transaction_count = 0
+
+    # Main data
+    settlement_date = None
+    card_number = None
+    owner = None
+    # Lines are only counted per classification when collecting stats
+    match_line = LINE_DISPATCHER.match if stats is None else stats.count_lines(LINE_DISPATCHER.match)
+    count_line = None if stats is None else stats.count_line
+    # Aux
+    dates: dict[str, date] = {}
+    reporter = DiagnosticReporter(diagnostics)
+    cursor = LineCursor(iter_pdf_lines(pdf, stats, reporter.page_starts, extract_workers))
+    for raw_line in cursor:
+        # Diagnostics keep the line as extracted
+        line = clean_line(raw_line)
+
+        if not line:
+            continue
+
+        kind, groups = match_line(line)
+
+        # End of file
+        if kind == 'file_end':
+            break
+
+        # Validation: add line to validation sets
+        if VALIDATION_PATTERN.match(line):
+            validation_transaction_count += 1
+
+        # Get settlement date
+        if kind == 'settlement_date':
+            # The value is on the next line
+            raw_line = read_line(cursor, count_line, 'settlement_date_value')
+            try:
+                settlement_date = get_settlement_date(clean_line(raw_line))
+            except Exception as e:
+                reporter.report('invalid_settlement_date', str(e), cursor.line_number, raw_line)
+            continue
+
+        # Get card number
+        if kind == 'card_number':
+            card_number = sys.intern(clean_line(read_line(cursor, count_line, 'card_number_value')))
+            continue
+
+        # Get owner
+        if kind == 'owner':
+            owner = sys.intern(clean_line(read_line(cursor, count_line, 'owner_value')))
+            continue
+
+        if kind == 'transaction_start':
+            # A skipped transaction is still read until its amount, so none of its lines is taken as another transaction
+            line_number = cursor.line_number
+            transaction_line = raw_line
+            skip = True
+
+            # Validation: card number, owner and settlement date must be found before any transaction
+            if card_number is None:
+                reporter.report('card_number_not_found', f'Card number not found, current line: {line}', line_number, raw_line)
+            elif owner is None:
+                reporter.report('owner_not_found', f'Owner not found, current line: {line}', line_number, raw_line)
+            elif settlement_date is None:
+                reporter.report('settlement_date_not_found', f'Settlement date not found, current line: {line}', line_number, raw_line)
+            else:
+                try:
+                    transaction_date = get_date(line, dates)
+                    skip = False
+                except Exception as e:
+                    reporter.report('invalid_date', str(e), line_number, raw_line)
+
+            # Skip the posting date, directly after the transaction date
+            read_line(cursor, count_line, 'transaction_posting_date')
+
+            # Get description until an amount is found
+            descriptions = []
+            amount = None
+            for raw_line in cursor:
+                line = clean_line(raw_line)
+
+                if AMOUNT_PATTERN.match(line):
+                    amount = line
+                    if count_line is not None:
+                        count_line('transaction_amount')
+
+                    # Detect CR transaction, which also the end of a transaction
+                    if clean_line(cursor.peek() or '') == LINE_CR:
+                        amount = f'{amount} CR'
+
+                    break
+
+                # The amount is missing, stop at the next transaction or the end of file instead of reading the pages after it
+                if line == LINE_FILE_END or TRANSACTION_START_PATTERN.match(line):
+                    cursor.push_back(raw_line)
+                    break
+
+                if count_line is not None and line:
+                    count_line('transaction_description')
+                descriptions.append(line)
+
+            if amount is None:
+                reporter.report('amount_not_found', f'Amount not found, descriptions: {descriptions}', line_number, transaction_line)
+                skip = True
+
+            order += 1
+            if skip:
+                continue
+
+            yield (
+                card_number,
+                owner,
+                transaction_date,
+                settlement_date,
+                get_amount(amount),
+                ' '.join(descriptions),
+                order,
+            )
+
+    # Validate the transaction count, skipped transactions included
+    if order != validation_transaction_count:
+        reporter.report('transaction_count', f'Validation failed: {order} != {validation_transaction_count}')
+
+
+def iter_parse(
+    pdf: str | bytes | memoryview | PdfReader | TextSource,
+    trusted: bool = False,
+    row_type: Callable | None = None,
+    stats: ParseStats | None = None,
+    strict: bool = True,
+    diagnostics: list[Diagnostic] | None = None,
+    extract_workers: int | None = None,
+) -> Iterator[PdfParsedRow]:
+    """
+    With strict=False, a transaction which can't be parsed is skipped and reported into diagnostics instead of raising a ParseError.
+    With extract_workers, the pages of a path or bytes are extracted by that many worker processes for very large statements.
+    """
+
+    if not strict and diagnostics is None:
+        diagnostics = []
+    records = iter_records(pdf, stats, None if strict else diagnostics, extract_workers)
+    yield from iter_rows(PdfParsedRow, records, trusted, row_type, stats)
+
+
+def parse(
+    pdf: str | bytes | memoryview | PdfReader | TextSource,
+    trusted: bool = False,
+    row_type: Callable | None = None,
+    stats: ParseStats | None = None,
+    strict: bool = True,
+    diagnostics: list[Diagnostic] | None = None,
+    extract_workers: int | None = None,
+) -> list[PdfParsedRow]:
+    return list(iter_parse(pdf, trusted, row_type, stats, strict, diagnostics, extract_workers))
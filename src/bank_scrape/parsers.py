@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import importlib
+
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, Iterator
+
+from .sources import TextSource, get_text_source, open_text_source
+from .utils.common import clean_line
+
+# Only used in annotations, the parsers import pydantic and PyPDF2 once used
+if TYPE_CHECKING:
+    from PyPDF2 import PdfReader
+
+    from .diagnostics import Diagnostic
+    from .stats import ParseStats
+
+# Parsers are referenced by name so they can be passed to worker processes and only imported once used
+PARSERS = {
+    'bca-credit': 'bank_scrape.bca_credit',
+    'bca-debit': 'bank_scrape.bca_debit',
+    'jenius-credit': 'bank_scrape.jenius_credit',
+}
+
+
+def get_parser(bank: str) -> ModuleType:
+    if bank not in PARSERS:
+        raise Exception(f'Unknown bank: {bank}, available: {", ".join(PARSERS)}')
+
+    return importlib.import_module(PARSERS[bank])
+
+# Lines which only exist in a given statement format, evaluated in order
+BANK_MARKERS = {
+    'bca-credit': ('TANGGAL REKENING :',),
+    'jenius-credit': ('Tanggal Cetak Tagihan',),
+    'bca-debit': ('NO. REKENING :', 'PERIODE :'),
+}
+
+
+def detect_bank(text: str) -> str:
+    lines = [clean_line(line) for line in text.split('\n')]
+    for bank, markers in BANK_MARKERS.items():
+        if any(marker in line for line in lines for marker in markers):
+            return bank
+
+    raise Exception('Unknown statement format, no marker found in the first page')
+
+
+def detect_parser(pdf: str | bytes | memoryview | PdfReader | TextSource) -> tuple[ModuleType, TextSource]:
+    """
+    Detect the statement format from the first page only, returning the matching parser and the pdf to parse.
+    The text of the first page is kept by the source, so the parser doesn't extract it again.
+    A source opened here out of a path or bytes holds the file until closed, see open_text_source().
+    """
+
+    source = get_text_source(pdf)
+    bank = detect_bank(source.get_text(0))
+
+    return get_parser(bank), source
+
+
+def iter_parse_any(
+    pdf: str | bytes | memoryview | PdfReader | TextSource,
+    stats: ParseStats | None = None,
+    strict: bool = True,
+    diagnostics: list[Diagnostic] | None = None,
+    extract_workers: int | None = None,
+) -> Iterator[Any]:
+    # The workers start extracting before the format is detected from the first page
+    with open_text_source(pdf, extract_workers) as source:
+        parser, source = detect_parser(source)
+        yield from parser.iter_parse(source, stats=stats, strict=strict, diagnostics=diagnostics)
+
+
+def parse_any(
+    pdf: str | bytes | memoryview | PdfReader | TextSource,
+    stats: ParseStats | None = None,
+    strict: bool = True,
+    diagnostics: list[Diagnostic] | None = None,
+    extract_workers: int | None = None,
+) -> list[Any]:
+    return list(iter_parse_any(pdf, stats, strict, diagnostics, extract_workers))
@@ -0,0 +1,158 @@
+import sqlite3
+
+from abc import ABC, abstractmethod
+from datetime import date
+from itertools import islice
+from pydantic import BaseModel
+from typing import Any, ContextManager, Iterable, Iterator
+
+# A statement never has two rows with the same order, reloading a statement updates its rows instead of duplicating them
+KEY_COLUMNS = ('card_number', 'settlement_date', 'order')
+
+POSTGRES_TYPES = {
+    str: 'TEXT',
+    date: 'DATE',
+    float: 'NUMERIC(20, 2)',
+    int: 'BIGINT',
+}
+SQLITE_TYPES = {
+    str: 'TEXT',
+    date: 'TEXT',
+    float: 'REAL',
+    int: 'INTEGER',
+}
+
+
+def iter_batches(rows: Iterable[Any], batch_size: int) -> Iterator[list[Any]]:
+    rows = iter(rows)
+    while batch := list(islice(rows, batch_size)):
+        yield batch
+
+
+class Sink(ABC):
+    """
+    Load parsed rows into a database table, created if not exists out of the fields of the row type.
+    Rows are upserted on the key columns so the same statement can be loaded again without duplicating rows.
+    The connection is kept open across write() calls, one sink loads any number of files.
+    """
+
+    types: dict[type, str]
+
+    def __init__(self, connection: Any, table: str, row_type: type[BaseModel], batch_size: int = 10000) -> None:
+        self.connection = connection
+        self.table = table
+        self.batch_size = batch_size
+        self.rows_written = 0
+
+        # Computed fields are stored as well (e.g. amount next to amount_cents), to be queried without converting them
+        annotations = {field: info.annotation for field, info in row_type.model_fields.items()}
+        annotations |= {field: info.return_type for field, info in row_type.model_computed_fields.items()}
+        self.columns = tuple(annotations)
+        self.column_types = {field: self.types[annotation] for field, annotation in annotations.items()}
+        if missing_columns := set(KEY_COLUMNS) - set(self.columns):
+            raise Exception(f'Key columns {missing_columns} not found in {row_type.__name__}')
+
+        self.create_table()
+
+    def __enter__(self) -> 'Sink':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @property
+    def column_list(self) -> str:
+        return ', '.join(f'"{column}"' for column in self.columns)
+
+    @property
+    def upsert_clause(self) -> str:
+        keys = ', '.join(f'"{column}"' for column in KEY_COLUMNS)
+        updates = ', '.join(f'"{column}" = excluded."{column}"' for column in self.columns if column not in KEY_COLUMNS)
+        return f'ON CONFLICT ({keys}) DO UPDATE SET {updates}'
+
+    def create_table(self) -> None:
+        columns = ', '.join(f'"{column}" {self.column_types[column]} NOT NULL' for column in self.columns)
+        keys = ', '.join(f'"{column}"' for column in KEY_COLUMNS)
+        with self.transaction():
+            self.connection.execute(f'CREATE TABLE IF NOT EXISTS {self.table} ({columns}, PRIMARY KEY ({keys}))')
+
+    def write(self, rows: Iterable[Any]) -> int:
+        count = 0
+        for batch in iter_batches(rows, self.batch_size):
+            self.write_batch([tuple(getattr(row, column) for column in self.columns) for row in batch])
+            count += len(batch)
+
+        self.rows_written += count
+        return count
+
+    @abstractmethod
+    def transaction(self) -> ContextManager:
+        ...
+
+    @abstractmethod
+    def write_batch(self, records: list[tuple]) -> None:
+        ...
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+class SqliteSink(Sink):
+    """
+    SQLite fallback for local testing, rows are upserted with executemany().
+    """
+
+    types = SQLITE_TYPES
+
+    def __init__(self, path: str, table: str, row_type: type[BaseModel], batch_size: int = 10000) -> None:
+        super().__init__(sqlite3.connect(path), table, row_type, batch_size)
+
+    def transaction(self) -> ContextManager:
+        # Commits on success, rolls back on failure
+        return self.connection
+
+    def write_batch(self, records: list[tuple]) -> None:
+        placeholders = ', '.join('?' for _ in self.columns)
+        records = [tuple(value.isoformat() if isinstance(value, date) else value for value in record) for record in records]
+        with self.transaction():
+            self.connection.executemany(f'INSERT INTO {self.table} ({self.column_list}) VALUES ({placeholders}) {self.upsert_clause}', records)
+
+
+class PostgresSink(Sink):
+    """
+    Stream the rows with COPY FROM STDIN into a temporary staging table, then upsert them into the target table in one statement per batch.
+    Requires psycopg 3, install rdxz2-bank-scrape[postgres].
+    """
+
+    types = POSTGRES_TYPES
+
+    def __init__(self, dsn: str, table: str, row_type: type[BaseModel], batch_size: int = 10000) -> None:
+        try:
+            import psycopg
+        except ImportError as e:
+            raise ImportError('psycopg is required for the Postgres sink, install rdxz2-bank-scrape[postgres]') from e
+
+        super().__init__(psycopg.connect(dsn, autocommit=True), table, row_type, batch_size)
+
+        self.staging_table = f'staging_{self.table.replace(".", "_")}'
+        with self.transaction():
+            self.connection.execute(f'CREATE TEMPORARY TABLE IF NOT EXISTS {self.staging_table} (LIKE {self.table} INCLUDING DEFAULTS)')
+
+    def transaction(self) -> ContextManager:
+        # Unlike sqlite3, leaving a psycopg connection context closes it, each transaction block commits on its own in autocommit mode
+        return self.connection.transaction()
+
+    def write_batch(self, records: list[tuple]) -> None:
+        keys = ', '.join(f'"{column}"' for column in KEY_COLUMNS)
+        with self.transaction(), self.connection.cursor() as cursor:
+            with cursor.copy(f'COPY {self.staging_table} ({self.column_list}) FROM STDIN') as copy:
+                for record in records:
+                    copy.write_row(record)
+
+            # A single upsert statement cannot update the same row twice, keep one row per key in case a batch holds a statement twice
+            cursor.execute(f'''
+                INSERT INTO {self.table} ({self.column_list})
+                SELECT DISTINCT ON ({keys}) {self.column_list} FROM {self.staging_table}
+                {self.upsert_clause}
+            ''')
+            cursor.execute(f'TRUNCATE {self.staging_table}')
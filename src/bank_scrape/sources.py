@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, BinaryIO, Iterator, Protocol, runtime_checkable
+
+# Only used in annotations, the backends are imported once a pdf is actually read
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+    from PyPDF2 import PageObject, PdfReader
+
+# Pages extracted by each task of ParallelTextSource, small enough to start parsing early and to balance the workers
+PARALLEL_CHUNK_PAGES = 8
+
+
+@runtime_checkable
+class TextSource(Protocol):
+    """
+    The text of a statement page by page, consumed by the parsers in place of a PdfReader.
+    """
+
+    page_count: int
+
+    def get_text(self, page: int) -> str:
+        ...
+
+
+class MemoizedTextSource(ABC):
+    """
+    Base of the text sources, the text of the last page read is kept so that a page read again right away (e.g. the first page, by the detection then by the parser) is only extracted once.
+    Only that page is kept, the memory of a statement streamed page by page doesn't grow with its page count.
+    """
+
+    def __init__(self, page_count: int) -> None:
+        self.page_count = page_count
+        self.last_page = -1
+        self.last_text = ''
+
+    @abstractmethod
+    def extract_text(self, page: int) -> str:
+        ...
+
+    def get_text(self, page: int) -> str:
+        if page != self.last_page:
+            self.last_text = self.extract_text(page)
+            self.last_page = page
+
+        return self.last_text
+
+
+class PyPDF2TextSource(MemoizedTextSource):
+    """
+    Default backend, anything with pages having extract_text() is accepted.
+    The content streams of a PdfReader page are released once its text is extracted, only the text is kept.
+    With close_stream, the stream of the reader (e.g. the mmap of a path) is closed along with the source.
+    """
+
+    def __init__(self, pdf: PdfReader, close_stream: bool = False) -> None:
+        self.pdf = pdf
+        self.pages = pdf.pages
+        self.close_stream = close_stream
+        super().__init__(len(self.pages))
+
+    def extract_text(self, page: int) -> str:
+        from PyPDF2 import PageObject
+
+        pdf_page = self.pages[page]
+        text = pdf_page.extract_text()
+        if isinstance(pdf_page, PageObject):
+            self.release(pdf_page)
+
+        return text
+
+    def release(self, page: PageObject) -> None:
+        from PyPDF2.generic import ArrayObject, IndirectObject
+
+        # The reader caches every resolved object, the decoded content streams included
+        if (resolved_objects := getattr(self.pdf, 'resolved_objects', None)) is None or '/Contents' not in page:
+            return
+
+        contents = page.raw_get('/Contents')
+        references = [contents]
+        if isinstance(contents, IndirectObject) and isinstance(contents.get_object(), ArrayObject):
+            references += contents.get_object()
+        elif isinstance(contents, ArrayObject):
+            references = list(contents)
+
+        for reference in references:
+            if isinstance(reference, IndirectObject):
+                resolved_objects.pop((reference.generation, reference.idnum), None)
+
+    def close(self) -> None:
+        if self.close_stream:
+            self.pdf.stream.close()
+
+
+def import_pypdfium2() -> ModuleType:
+    try:
+        import pypdfium2
+    except ImportError as e:
+        raise ImportError('pypdfium2 is required for the pdfium text source, install rdxz2-bank-scrape[pdfium]') from e
+
+    return pypdfium2
+
+
+class PdfiumTextSource(MemoizedTextSource):
+    """
+    Faster backend on top of pdfium, its text may differ from PyPDF2 on some statements so check the parsed rows before switching.
+    """
+
+    def __init__(self, file: str | bytes | memoryview | BinaryIO, password: str | None = None) -> None:
+        pdfium = import_pypdfium2()
+
+        # pdfium takes bytes but no other buffer
+        if isinstance(file, memoryview):
+            file = file.tobytes()
+
+        self.pdf = pdfium.PdfDocument(file, password=password)
+        super().__init__(len(self.pdf))
+
+    def extract_text(self, page: int) -> str:
+        pdf_page = self.pdf[page]
+        text_page = pdf_page.get_textpage()
+        try:
+            # Same line separator as PyPDF2
+            return text_page.get_text_range().replace('\r\n', '\n')
+        finally:
+            text_page.close()
+            pdf_page.close()
+
+    def close(self) -> None:
+        self.pdf.close()
+
+
+# The pdf opened once by each worker process of ParallelTextSource
+worker_source: PyPDF2TextSource | None = None
+
+
+def init_worker(file: str | bytes, password: str | list[str] | None) -> None:
+    global worker_source
+
+    # Imported here, common imports this module
+    from .utils.common import open_pdf
+
+    worker_source = PyPDF2TextSource(open_pdf(file, password))
+
+
+def extract_worker_pages(start: int, stop: int) -> list[str]:
+    return [worker_source.get_text(page) for page in range(start, stop)]
+
+
+class ParallelTextSource(MemoizedTextSource):
+    """
+    Pages extracted by a pool of worker processes, each opening and decrypting the file once then extracting chunks of consecutive pages.
+    All chunks are submitted upfront in page order, the parser reads the first pages while the workers extract the next ones.
+
+    Give the path rather than the bytes of a large file, the bytes are copied into every worker.
+    Close it to stop the workers, a parser stopping at its end marker leaves the remaining chunks unread.
+    """
+
+    def __init__(
+        self,
+        file: str | bytes | memoryview,
+        password: str | list[str] | None = None,
+        workers: int | None = None,
+        chunk_pages: int = PARALLEL_CHUNK_PAGES,
+    ) -> None:
+        from concurrent.futures import ProcessPoolExecutor
+
+        from .utils.common import open_pdf
+
+        # Sent to the workers, a memoryview can't be pickled
+        if isinstance(file, memoryview):
+            file = file.tobytes()
+
+        # Also checks the password before starting any worker
+        pdf = open_pdf(file, password)
+        try:
+            super().__init__(len(pdf.pages))
+        finally:
+            pdf.stream.close()
+
+        self.chunk_pages = chunk_pages
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(file, password))
+        self.chunks: list[Future | None] = [self.submit(chunk) for chunk in range(-(-self.page_count // chunk_pages))]
+        # Only the chunk being read is kept, its future is released
+        self.chunk = -1
+        self.chunk_texts: list[str] = []
+
+    def submit(self, chunk: int) -> Future:
+        start = chunk * self.chunk_pages
+        return self.executor.submit(extract_worker_pages, start, min(start + self.chunk_pages, self.page_count))
+
+    def extract_text(self, page: int) -> str:
+        chunk = page // self.chunk_pages
+        if chunk != self.chunk:
+            # A chunk read again is extracted again
+            future = self.chunks[chunk] or self.submit(chunk)
+            self.chunks[chunk] = None
+            self.chunk_texts = future.result()
+            self.chunk = chunk
+
+        return self.chunk_texts[page - chunk * self.chunk_pages]
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self) -> ParallelTextSource:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+class ExtractedTextSource(MemoizedTextSource):
+    """
+    Text extracted beforehand, from a cache or test data.
+    """
+
+    def __init__(self, texts: list[str]) -> None:
+        super().__init__(len(texts))
+        self.texts = list(texts)
+
+    def extract_text(self, page: int) -> str:
+        return self.texts[page]
+
+
+def get_text_source(pdf: Any, extract_workers: int | None = None) -> TextSource:
+    """
+    Use the given text source as is, any other pdf is read through PyPDF2.
+    A path or the bytes of an unencrypted pdf are opened first, use open_pdf() with the password for an encrypted one.
+    With extract_workers, the pages of a path or bytes are extracted by a ParallelTextSource of that many worker processes.
+    """
+
+    if isinstance(pdf, TextSource):
+        return pdf
+
+    if extract_workers is not None:
+        if not isinstance(pdf, (str, bytes, memoryview)):
+            raise Exception('extract_workers requires the path or the bytes of the pdf, use ParallelTextSource with the password for an encrypted one')
+
+        return ParallelTextSource(pdf, workers=extract_workers)
+
+    if isinstance(pdf, (str, bytes, memoryview)):
+        # Imported here, common imports this module
+        from .utils.common import open_pdf
+
+        # Opened here, closed along with the source
+        return PyPDF2TextSource(open_pdf(pdf), close_stream=True)
+
+    return PyPDF2TextSource(pdf)
+
+
+@contextmanager
+def open_text_source(pdf: Any, extract_workers: int | None = None) -> Iterator[TextSource]:
+    """
+    Same as get_text_source(), a source created here is closed on exit while a given one is left open.
+    """
+
+    source = get_text_source(pdf, extract_workers)
+    try:
+        yield source
+    finally:
+        if source is not pdf and hasattr(source, 'close'):
+            source.close()
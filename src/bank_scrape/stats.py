@@ -0,0 +1,108 @@
+import time
+
+from pydantic import BaseModel, Field
+from typing import Any, Callable, Iterable, Iterator
+
+
+class ParseStats(BaseModel):
+    """
+    Collected while parsing when passed as stats to a parser, nothing is measured otherwise.
+
+    Pages after the end of statement marker of the format are never extracted, they're counted as skipped_pages.
+    Lines are the non-empty lines classified by the parser, each counted once, so line_kinds always sums up to lines.
+
+    Stages are measured in wall time seconds:
+    - decryption: opening and decrypting the pdf, only when parsing a file through bank_scrape.batch
+    - extraction: page.extract_text()
+    - parsing: the line state machine, including the transaction count validation
+    - rows: building the rows out of the parsed records
+
+    The observers are called with the stats once parsing ends, including when it fails, to export them (e.g. OpenTelemetry, Prometheus).
+    """
+
+    pages: int = 0
+    skipped_pages: int = 0
+    lines: int = 0
+    rows: int = 0
+    line_kinds: dict[str, int] = {}
+    stage_seconds: dict[str, float] = {}
+
+    observers: list[Callable[['ParseStats'], None]] = Field(default=[], exclude=True)
+
+    def add_stage_seconds(self, stage: str, seconds: float) -> None:
+        self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+
+    def add_page(self, seconds: float) -> None:
+        self.pages += 1
+        self.add_stage_seconds('extraction', seconds)
+
+    def count_line(self, kind: str | None) -> None:
+        key = kind or 'other'
+        self.lines += 1
+        self.line_kinds[key] = self.line_kinds.get(key, 0) + 1
+
+    def count_lines(self, match: Callable[[str], tuple[str | None, tuple]]) -> Callable[[str], tuple[str | None, tuple]]:
+        """
+        Wrap the match function of a line dispatcher to count the lines per classification.
+        """
+
+        count_line = self.count_line
+
+        def counting_match(line: str) -> tuple[str | None, tuple]:
+            kind, groups = match(line)
+            count_line(kind)
+            return kind, groups
+
+        return counting_match
+
+    def iter_rows(self, build_row: Callable[[tuple], Any], records: Iterable[tuple]) -> Iterator[Any]:
+        """
+        Build the rows out of the records, measuring the time spent producing the records and building the rows.
+        Time spent by the consumer between two rows isn't measured.
+        """
+
+        rows = 0
+        records_seconds = 0.0
+        rows_seconds = 0.0
+        # Producing the records includes extracting the pages, which is measured on its own
+        extraction_seconds = self.stage_seconds.get('extraction', 0.0)
+        records = iter(records)
+        try:
+            while True:
+                start = time.perf_counter()
+                record = next(records, None)
+                records_seconds += time.perf_counter() - start
+                if record is None:
+                    break
+
+                start = time.perf_counter()
+                row = build_row(record)
+                rows_seconds += time.perf_counter() - start
+
+                rows += 1
+                yield row
+        finally:
+            self.rows += rows
+            self.add_stage_seconds('parsing', records_seconds - (self.stage_seconds.get('extraction', 0.0) - extraction_seconds))
+            self.add_stage_seconds('rows', rows_seconds)
+            self.notify()
+
+    def notify(self) -> None:
+        for observer in self.observers:
+            observer(self)
+
+    def to_metrics(self, prefix: str = 'bank_scrape') -> list[tuple[str, dict[str, str], float]]:
+        """
+        Flatten the stats into (name, labels, value) samples, ready to be set on exporter instruments.
+        """
+
+        metrics = [
+            (f'{prefix}_pages_total', {}, self.pages),
+            (f'{prefix}_skipped_pages_total', {}, self.skipped_pages),
+            (f'{prefix}_lines_total', {}, self.lines),
+            (f'{prefix}_rows_total', {}, self.rows),
+        ]
+        metrics += [(f'{prefix}_lines_by_kind_total', {'kind': kind}, count) for kind, count in self.line_kinds.items()]
+        metrics += [(f'{prefix}_stage_seconds', {'stage': stage}, seconds) for stage, seconds in self.stage_seconds.items()]
+
+        return metrics
@@ -0,0 +1,216 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from datetime import date, timedelta
+from itertools import repeat
+from operator import itemgetter
+from pydantic import BaseModel
+from typing import Any, Iterable, Iterator, NamedTuple
+
+from .columnar import EPOCH, EPOCH_ORDINAL, ColumnarStatement
+
+# A transaction printed again in the next statement only differs by these
+DEDUP_EXCLUDED_FIELDS = ('settlement_date', 'order')
+
+PERIODS = ('day', 'month', 'year')
+
+
+class Aggregate(NamedTuple):
+    count: int
+    amount_cents: int
+
+
+def get_period(value: date, period: str) -> date:
+    if period == 'month':
+        return value.replace(day=1)
+    elif period == 'year':
+        return value.replace(month=1, day=1)
+
+    return value
+
+
+class StatementStore:
+    """
+    Parsed rows of many statements of the same format, stored in typed columns (see ColumnarStatement) and indexed by (card_number, transaction_date).
+
+    - The index is a composite int64 key of the card number code and the transaction date, on the first query after new rows are added only their keys are sorted then merged into the index
+    - Range queries bisect the sorted keys
+    - A transaction already stored from another statement is skipped, identical transactions within the same statement are all kept
+
+    Dedup hashes every field except the settlement date and the order of the row.
+    """
+
+    def __init__(self, row_type: type[BaseModel]) -> None:
+        for field in ('card_number', 'transaction_date', 'amount_cents'):
+            if field not in row_type.model_fields:
+                raise Exception(f'{field} not found in {row_type.__name__}')
+
+        self.row_type = row_type
+        self.fields = tuple(row_type.model_fields)
+        self.statement = ColumnarStatement(row_type)
+        self.duplicates = 0
+
+        # Dictionary values by code
+        self.dictionary_values: dict[str, list[str]] = {}
+
+        # Key of each row, in insertion order
+        self.row_keys = array('q')
+        # Row indexes sorted by key, and the sorted keys to bisect
+        self.index = array('q')
+        self.keys = array('q')
+
+        # Number of stored rows of each transaction hash
+        self.hash_counts: dict[int, int] = {}
+        self.get_dedup_values = itemgetter(*(i for i, field in enumerate(self.fields) if field not in DEDUP_EXCLUDED_FIELDS))
+
+    def __len__(self) -> int:
+        return len(self.statement)
+
+    def get_key(self, card_code: int, days: int) -> int:
+        # Card code in the high 32 bits, dates before epoch are negative days which still sort in order
+        return (card_code << 32) + days
+
+    def add(self, rows: Iterable[Any]) -> int:
+        """
+        Add the parsed rows of one statement, returning the number of rows stored.
+        """
+
+        return self.add_records([tuple(getattr(row, field) for field in self.fields) for row in rows])
+
+    def add_records(self, records: list[tuple]) -> int:
+        """
+        Add the records of one statement (see iter_records() of the parsers), returning the number of records stored.
+        """
+
+        # Multiset difference, a transaction appearing n times in the statement and m times in the store is stored max(n - m, 0) more times
+        hashes = list(map(hash, map(self.get_dedup_values, records)))
+        statement_counts = Counter(hashes)
+
+        skips = {x: min(count, self.hash_counts.get(x, 0)) for x, count in statement_counts.items()}
+        for x, count in statement_counts.items():
+            self.hash_counts[x] = max(count, self.hash_counts.get(x, 0))
+
+        stored_records = []
+        for record, x in zip(records, hashes):
+            if skips[x]:
+                skips[x] -= 1
+                self.duplicates += 1
+                continue
+
+            stored_records.append(record)
+
+        # Appended column by column, the keys are built out of the stored card codes and days
+        start = len(self.statement)
+        self.statement.extend_list(stored_records)
+        self.row_keys.extend(map(self.get_key, self.statement.columns['card_number'][start:], self.statement.columns['transaction_date'][start:]))
+
+        return len(stored_records)
+
+    def get_index(self) -> tuple[array, array]:
+        if (start := len(self.index)) == len(self.row_keys):
+            return self.index, self.keys
+
+        # Only the new rows are sorted, then merged into the sorted keys by copying the runs of old rows between them
+        row_keys = self.row_keys
+        new_rows = sorted(range(start, len(row_keys)), key=row_keys.__getitem__)
+        old_index, old_keys = self.index, self.keys
+        index, keys = array('q'), array('q')
+        position = 0
+        for i in new_rows:
+            key = row_keys[i]
+            # After the old rows of the same key, which were inserted before
+            if (end := bisect_right(old_keys, key, position)) != position:
+                index += old_index[position:end]
+                keys += old_keys[position:end]
+                position = end
+            index.append(i)
+            keys.append(key)
+        index += old_index[position:]
+        keys += old_keys[position:]
+
+        self.index, self.keys = index, keys
+        return index, keys
+
+    def get_record(self, index: int) -> tuple:
+        record = []
+        for field, info in self.row_type.model_fields.items():
+            value = self.statement.columns[field][index]
+            if field in self.statement.dictionaries:
+                value = self.get_dictionary_values(field)[value]
+            elif info.annotation is date:
+                value = EPOCH + timedelta(days=value)
+            record.append(value)
+
+        return tuple(record)
+
+    def get_dictionary_values(self, field: str) -> list[str]:
+        # Values by code, rebuilt only once new values are added
+        values = self.dictionary_values.get(field)
+        dictionary = self.statement.dictionaries[field]
+        if values is None or len(values) != len(dictionary):
+            values = self.dictionary_values[field] = list(dictionary)
+
+        return values
+
+    def iter_range_indexes(self, card_number: str, start: date | None = None, end: date | None = None) -> Iterator[int]:
+        if (card_code := self.statement.dictionaries['card_number'].get(card_number)) is None:
+            return
+
+        index, keys = self.get_index()
+        lo = self.get_key(card_code, -(1 << 31) if start is None else start.toordinal() - EPOCH_ORDINAL)
+        hi = self.get_key(card_code, (1 << 31) - 1 if end is None else end.toordinal() - EPOCH_ORDINAL)
+        for i in range(bisect_left(keys, lo), bisect_right(keys, hi)):
+            yield index[i]
+
+    def query(self, card_number: str, start: date | None = None, end: date | None = None) -> list[BaseModel]:
+        """
+        Rows of a card with a transaction date between start and end (inclusive), ordered by transaction date then insertion.
+        """
+
+        return [self.row_type(**dict(zip(self.fields, self.get_record(i)))) for i in self.iter_range_indexes(card_number, start, end)]
+
+    def aggregate(self, by: Iterable[str] = ('card_number',), period: str | None = None) -> dict[tuple, Aggregate]:
+        """
+        Count and total amount of the rows grouped by the given fields, and by the transaction date truncated to the period (day, month or year) if given.
+        """
+
+        by = tuple(by)
+        if period is not None and period not in PERIODS:
+            raise Exception(f'Unknown period: {period}, available: {", ".join(PERIODS)}')
+
+        columns = [self.statement.columns[field] for field in by]
+        if period is not None:
+            columns.append(self.statement.columns['transaction_date'])
+        amounts = self.statement.columns['amount_cents']
+
+        # Group on the stored codes and days, only decoded once per group
+        groups: dict[tuple, list[int]] = {}
+        keys = zip(*columns) if columns else repeat((), len(amounts))
+        for key, amount in zip(keys, amounts):
+            if (group := groups.get(key)) is None:
+                group = groups[key] = [0, 0]
+            group[0] += 1
+            group[1] += amount
+
+        decoders = [self.get_value_decoder(field) for field in by]
+        if period is not None:
+            decoders.append(lambda days: get_period(EPOCH + timedelta(days=days), period))
+
+        aggregates = {}
+        for key, (count, amount) in groups.items():
+            key = tuple(decode(x) for decode, x in zip(decoders, key))
+            # Different days may truncate to the same period
+            if (aggregate := aggregates.get(key)) is not None:
+                count, amount = count + aggregate.count, amount + aggregate.amount_cents
+            aggregates[key] = Aggregate(count, amount)
+
+        return aggregates
+
+    def get_value_decoder(self, field: str) -> Any:
+        info = self.row_type.model_fields[field]
+        if field in self.statement.dictionaries:
+            return self.get_dictionary_values(field).__getitem__
+        elif info.annotation is date:
+            return lambda days: EPOCH + timedelta(days=days)
+
+        return lambda value: value
@@ -0,0 +1,42 @@
+import re
+
+# Only matched at a fixed position, none of them can backtrack
+DIGITS_PATTERN = re.compile(r'\d*')
+GROUP_DIGITS_PATTERN = re.compile(r'\d{3}')
+NUMBER_START_PATTERN = re.compile(r'(?<!\d)\d')
+
+
+def find_number_end(text: str, start: int, separator: str) -> int:
+    """
+    End of the number \\d{1,3}(?:<separator>\\d{3})* beginning at start with as many groups as possible, -1 if the digits at start aren't 1 to 3.
+    The start must not follow a digit.
+    """
+
+    end = DIGITS_PATTERN.match(text, start).end()
+    if not 0 < end - start <= 3:
+        return -1
+
+    while text.startswith(separator, end) and GROUP_DIGITS_PATTERN.match(text, end + 1):
+        end += 4
+
+    return end
+
+
+def get_reversed_number_regex(separator: str) -> str:
+    """
+    The number \\d{1,3}(?:<separator>\\d{3})* written right to left, to match the longest number ending a text against the reversed text.
+    The groups backtrack at most once, when the last one is followed by too few digits, so the match is linear in the length of the text.
+    """
+
+    return rf'(?:\d{{3}}{re.escape(separator)})*\d{{1,3}}'
+
+
+def rmatch_start(pattern: re.Pattern, text: str) -> int:
+    """
+    Start of the end of the text matching the reversed pattern, -1 if none.
+    """
+
+    if match := pattern.match(text[::-1]):
+        return len(text) - match.end()
+
+    return -1
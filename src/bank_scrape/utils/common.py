@@ -1,8 +1,149 @@
-import re
+from __future__ import annotations
+
+import io
+import mmap
+import time
+
+from datetime import date
+from typing import TYPE_CHECKING, Any, BinaryIO, Callable, Iterator
+
+from ..sources import TextSource, open_text_source
+
+# Only used in annotations, PyPDF2 is imported once a pdf is actually opened
+if TYPE_CHECKING:
+    from pydantic import BaseModel
+    from PyPDF2 import PdfReader
+
+    from ..stats import ParseStats
 
 
 def clean_line(line: str) -> str:
     # Remove all double space occurrences
     # Clean up leading or trailing whitespaces
     # Convert all tab character into whitespace
-    return re.sub(r'\s+', ' ', line.strip()).replace('\t', ' ')
+    # str.split() without separator does all of it in a single pass, equivalent to re.sub(r'\s+', ' ', line.strip())
+    return ' '.join(line.split())
+
+
+def iter_pdf_lines(
+    pdf: str | bytes | memoryview | PdfReader | TextSource,
+    stats: ParseStats | None = None,
+    page_starts: list[int] | None = None,
+    extract_workers: int | None = None,
+) -> Iterator[str]:
+    """
+    Extract the text one page at a time, the next page is only decoded once all lines of the current page are consumed.
+    The number of lines before each page is appended to page_starts when given, to locate a line in its page.
+    With extract_workers, the pages are extracted ahead by that many worker processes (see ParallelTextSource) and still read in order.
+    """
+
+    with open_text_source(pdf, extract_workers) as source:
+        line_count = 0
+        if stats is None:
+            for page in range(source.page_count):
+                lines = source.get_text(page).split('\n')
+                if page_starts is not None:
+                    page_starts.append(line_count)
+                    line_count += len(lines)
+                yield from lines
+            return
+
+        pages = 0
+        try:
+            for page in range(source.page_count):
+                start = time.perf_counter()
+                lines = source.get_text(page).split('\n')
+                stats.add_page(time.perf_counter() - start)
+                pages += 1
+                if page_starts is not None:
+                    page_starts.append(line_count)
+                    line_count += len(lines)
+                yield from lines
+        finally:
+            # The parser stopped reading at its end marker
+            stats.skipped_pages += source.page_count - pages
+
+
+def get_cents(amount: str, thousands_separator: str, decimal_separator: str) -> int:
+    # Exact integer cents, float() can't represent most cents and the error adds up when summing a statement
+    whole, _, fraction = amount.partition(decimal_separator)
+    return int(whole.replace(thousands_separator, '') or '0') * 100 + int(fraction.ljust(2, '0')[:2])
+
+
+def get_date(text: str, dates: dict[str, date]) -> date:
+    if (value := dates.get(text)) is None:
+        raise Exception(f'Invalid date: {text}')
+
+    return value
+
+
+def get_pdf_stream(file: str | bytes | memoryview | BinaryIO) -> BinaryIO:
+    if isinstance(file, str):
+        # Mapped instead of read into memory, the OS only loads the parts of the file which are read
+        with open(file, 'rb') as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if isinstance(file, (bytes, memoryview)):
+        return io.BytesIO(file)
+
+    return file
+
+
+def open_pdf(file: str | bytes | memoryview | BinaryIO, password: str | list[str] | None = None) -> PdfReader:
+    from PyPDF2 import PasswordType, PdfReader
+
+    pdf = PdfReader(get_pdf_stream(file))
+    if pdf.is_encrypted:
+        # A list of candidate passwords is tried in order, without any the empty user password opens pdfs only protected by an owner password
+        passwords = password if isinstance(password, list) else [password or '']
+        if all(pdf.decrypt(x) == PasswordType.NOT_DECRYPTED for x in passwords):
+            raise Exception(f'Wrong password for {file if isinstance(file, str) else "pdf"}')
+
+    return pdf
+
+
+def get_row_factory(model: type[BaseModel], trusted: bool = False, row_type: Callable | None = None) -> Callable[[tuple], Any]:
+    """
+    Build a row out of a record, the tuple of values in the field order of the model yielded by the parsers.
+
+    - row_type: any type taking the values positionally (e.g. a NamedTuple), skipping pydantic altogether
+    - trusted: build the pydantic model without validation, the values produced by the parsers are already typed
+    """
+
+    if row_type is not None:
+        return lambda record: row_type(*record)
+
+    fields = tuple(model.model_fields)
+    if not trusted:
+        return lambda record: model(**dict(zip(fields, record)))
+
+    # Same as model.model_construct(), without its per call handling of defaults and aliases which the parsers never need
+    fields_set = set(fields)
+
+    def construct(record: tuple) -> BaseModel:
+        row = model.__new__(model)
+        object.__setattr__(row, '__dict__', dict(zip(fields, record)))
+        object.__setattr__(row, '__pydantic_fields_set__', fields_set)
+        object.__setattr__(row, '__pydantic_extra__', None)
+        object.__setattr__(row, '__pydantic_private__', None)
+        return row
+
+    return construct
+
+
+def iter_rows(
+    model: type[BaseModel],
+    records: Iterator[tuple],
+    trusted: bool = False,
+    row_type: Callable | None = None,
+    stats: ParseStats | None = None,
+) -> Iterator[Any]:
+    """
+    The rows of the records of a parser, shared by the iter_parse() of the parser modules.
+    """
+
+    build_row = get_row_factory(model, trusted, row_type)
+    if stats is None:
+        return map(build_row, records)
+
+    return stats.iter_rows(build_row, records)
@@ -0,0 +1,69 @@
+import re
+
+from collections import deque
+from typing import Iterable, Iterator
+
+
+class LineDispatcher:
+    """
+    Classify a line against an ordered set of rules in a single regex scan.
+
+    All rules are compiled once into one alternation of named groups. Like a chain of if/elif re.match() calls, the first rule matching the line wins.
+    """
+
+    def __init__(self, rules: dict[str, str]) -> None:
+        self.spans: dict[str, tuple[int, int]] = {}
+
+        alternatives = []
+        group_count = 0
+        for name, pattern in rules.items():
+            # The named group itself takes one slot, followed by the groups of the rule
+            rule_group_count = re.compile(pattern).groups
+            self.spans[name] = (group_count + 1, group_count + 1 + rule_group_count)
+            group_count += 1 + rule_group_count
+
+            alternatives.append(f'(?P<{name}>{pattern})')
+
+        self.regex = re.compile('|'.join(alternatives))
+
+    def match(self, line: str) -> tuple[str | None, tuple[str, ...]]:
+        if not (match := self.regex.match(line)):
+            return None, ()
+
+        # The rule group always closes last, so it's the last matched group
+        start, end = self.spans[match.lastgroup]
+        return match.lastgroup, match.groups()[start:end]
+
+
+class LineCursor:
+    """
+    Iterate over lines with a bounded lookahead, replacing Queue without locking nor materializing all lines.
+    """
+
+    def __init__(self, lines: Iterable[str]) -> None:
+        self.lines = iter(lines)
+        self.lookahead: deque[str] = deque()
+        self.line_number = 0
+
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        line = self.lookahead.popleft() if self.lookahead else next(self.lines)
+        self.line_number += 1
+        return line
+
+    def push_back(self, line: str) -> None:
+        # Read again by the next call, e.g. a line which ends the current block and begins the next one
+        self.lookahead.appendleft(line)
+        self.line_number -= 1
+
+    def peek(self, n: int = 1) -> str | None:
+        # Only buffer as many lines as requested
+        while len(self.lookahead) < n:
+            try:
+                self.lookahead.append(next(self.lines))
+            except StopIteration:
+                return None
+
+        return self.lookahead[n - 1]
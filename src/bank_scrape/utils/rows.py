@@ -0,0 +1,27 @@
+from decimal import Decimal
+from pydantic import BaseModel, computed_field
+
+
+class AmountView:
+    """
+    The amount of a row out of its exact amount_cents, shared by the pydantic rows and their NamedTuple counterparts.
+    """
+
+    __slots__ = ()
+
+    @property
+    def amount(self) -> float:
+        return self.amount_cents / 100
+
+    @property
+    def amount_decimal(self) -> Decimal:
+        return Decimal(self.amount_cents).scaleb(-2)
+
+
+class ParsedRow(AmountView, BaseModel):
+    """
+    Base of the rows of the parsers, which only declare their fields. amount is serialized along with them, amount_decimal isn't.
+    """
+
+    amount = computed_field(AmountView.amount)
+
@@ -0,0 +1,284 @@
+import fnmatch
+import hashlib
+import os
+import signal
+import sqlite3
+import time
+
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Iterator, NamedTuple
+
+from .diagnostics import Diagnostic, ParseError
+from .parsers import PARSERS, detect_bank, get_parser
+from .sources import get_text_source
+from .utils.common import open_pdf
+
+
+class ManifestEntry(NamedTuple):
+    path: str
+    size: int
+    mtime_ns: int
+    digest: str
+    parser: str
+    rows: int
+
+
+class IngestResult(NamedTuple):
+    file: str
+    size: int
+    mtime_ns: int
+    digest: str
+    parser: str | None
+    rows: list[Any]
+    diagnostics: list[Diagnostic]
+    # Same content and parser version as the manifest, only its size or mtime changed
+    unchanged: bool = False
+
+    @property
+    def failed(self) -> bool:
+        # Same as FileResult, some transactions or the whole file couldn't be parsed
+        return bool(self.diagnostics)
+
+    @property
+    def recorded(self) -> bool:
+        # Rows parsed despite some skipped transactions are emitted, the file isn't parsed again
+        return bool(self.rows) or not self.diagnostics
+
+
+def get_parser_tag(bank: str) -> str:
+    # Same as the parse cache, a new parser version parses the file again
+    return f'{bank}:{get_parser(bank).PARSER_VERSION}'
+
+
+def is_current_parser(tag: str) -> bool:
+    bank = tag.rpartition(':')[0]
+    return bank in PARSERS and tag == get_parser_tag(bank)
+
+
+class Manifest:
+    """
+    Files already ingested, stored in a SQLite database and loaded in memory to compare each scan without querying.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.db = sqlite3.connect(path)
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS manifest (
+                path TEXT NOT NULL PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                digest TEXT NOT NULL,
+                parser TEXT NOT NULL,
+                rows INTEGER NOT NULL,
+                ingested_at REAL NOT NULL
+            )
+        ''')
+        self.db.commit()
+
+        self.entries = {
+            record[0]: ManifestEntry(*record) for record in self.db.execute('SELECT path, size, mtime_ns, digest, parser, rows FROM manifest')
+        }
+
+    def __enter__(self) -> 'Manifest':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def get(self, path: str) -> ManifestEntry | None:
+        return self.entries.get(path)
+
+    def put(self, entry: ManifestEntry) -> None:
+        self.db.execute('INSERT OR REPLACE INTO manifest VALUES (?, ?, ?, ?, ?, ?, ?)', (*entry, time.time()))
+        self.db.commit()
+        self.entries[entry.path] = entry
+
+
+def init_worker() -> None:
+    # Ctrl-C reaches the whole process group, only the watcher stops on it
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def ingest_file(file: str, password: str | list[str] | None, bank: str, strict: bool, known: ManifestEntry | None) -> IngestResult:
+    """
+    Hash and parse a file in a worker process. Whole file failures are reported as diagnostics, like parse_file() with strict=False.
+    """
+
+    try:
+        with open(file, 'rb') as f:
+            data = f.read()
+            # The stat of the content actually read, a write after it is picked up by the next scan
+            stat = os.fstat(f.fileno())
+    except OSError as e:
+        # Moved away or unreadable since scanned, failed under its current stat if any so that it isn't tried again until it changes
+        try:
+            stat = os.stat(file)
+            key = (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            key = (-1, -1)
+        return IngestResult(file, *key, '', None, [], [Diagnostic(file=file, rule='file', message=str(e))])
+
+    digest = hashlib.sha256(data).hexdigest()
+    if known is not None and known.digest == digest and is_current_parser(known.parser):
+        return IngestResult(file, stat.st_size, stat.st_mtime_ns, digest, known.parser, [], [], unchanged=True)
+
+    rows = []
+    diagnostics = []
+    parser_tag = None
+    try:
+        pdf = open_pdf(data, password)
+        if bank == 'auto':
+            # Memoized, the first page is only extracted once
+            pdf = get_text_source(pdf)
+            bank = detect_bank(pdf.get_text(0))
+
+        parser_tag = get_parser_tag(bank)
+        for row in get_parser(bank).iter_parse(pdf, strict=strict, diagnostics=diagnostics):
+            rows.append(row)
+    except ParseError as e:
+        diagnostics.append(e.diagnostic)
+    except Exception as e:
+        diagnostics.append(Diagnostic(rule='file', message=str(e)))
+
+    # Strict is all or nothing
+    if strict and diagnostics:
+        rows = []
+
+    for diagnostic in diagnostics:
+        diagnostic.file = file
+
+    return IngestResult(file, stat.st_size, stat.st_mtime_ns, digest, parser_tag, rows, diagnostics)
+
+
+class FolderWatcher:
+    """
+    Ingest the statements landing in a folder, new or changed files are parsed by a bounded process pool and yielded as soon as each is done.
+
+    - A file recorded in the manifest with the same size, mtime and parser version is skipped without being read, one with the same content hash is only stamped again
+    - A file is only picked up once its size and mtime stayed the same for settle_seconds, or its mtime is older than that, so files still being written are left alone
+    - At most max_pending files are parsed or queued at once, the others are picked up by the next scans
+    - A file which fails as a whole (e.g. wrong password) isn't recorded, it's tried again once changed or on the next start
+
+    A file is recorded in the manifest once the consumer asks for the next result, after it has written the rows, so a crash never loses rows but may emit them again.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        manifest: Manifest,
+        password: str | list[str] | None,
+        bank: str = 'auto',
+        strict: bool = True,
+        workers: int | None = None,
+        pattern: str = '*.pdf',
+        settle_seconds: float = 2.0,
+        interval: float = 1.0,
+    ) -> None:
+        self.directory = os.path.abspath(directory)
+        self.manifest = manifest
+        self.password = password
+        self.bank = bank
+        self.strict = strict
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = self.workers * 2
+        self.pattern = pattern.lower()
+        self.settle_seconds = settle_seconds
+        self.interval = interval
+
+        # (size, mtime_ns) of the files being written and since when it's unchanged
+        self.settling: dict[str, tuple[tuple[int, int], float]] = {}
+        # (size, mtime_ns) of the files which failed, not tried again until they change
+        self.failed: dict[str, tuple[int, int]] = {}
+        self.in_flight: set[str] = set()
+
+    def is_current(self, entry: ManifestEntry | None, key: tuple[int, int]) -> bool:
+        return entry is not None and (entry.size, entry.mtime_ns) == key and is_current_parser(entry.parser)
+
+    def scan(self) -> list[str]:
+        """
+        Files ready to be ingested, in name order.
+        """
+
+        ready = []
+        now = time.monotonic()
+        with os.scandir(self.directory) as entries:
+            for entry in sorted(entries, key=lambda x: x.name):
+                # The pattern is matched case insensitively, statements come as .pdf or .PDF
+                if not fnmatch.fnmatch(entry.name.lower(), self.pattern) or entry.path in self.in_flight:
+                    continue
+
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    # Moved away since listed
+                    continue
+
+                key = (stat.st_size, stat.st_mtime_ns)
+                if self.failed.get(entry.path) == key or self.is_current(self.manifest.get(entry.path), key):
+                    self.settling.pop(entry.path, None)
+                    continue
+
+                if time.time() - stat.st_mtime < self.settle_seconds:
+                    # Still being written, or only just done
+                    since = self.settling.get(entry.path)
+                    if since is None or since[0] != key:
+                        self.settling[entry.path] = (key, now)
+                        continue
+                    if now - since[1] < self.settle_seconds:
+                        continue
+
+                self.settling.pop(entry.path, None)
+                ready.append(entry.path)
+
+        return ready
+
+    def record(self, result: IngestResult) -> None:
+        if not result.recorded:
+            self.failed[result.file] = (result.size, result.mtime_ns)
+            return
+
+        self.failed.pop(result.file, None)
+        rows = self.manifest.get(result.file).rows if result.unchanged else len(result.rows)
+        self.manifest.put(ManifestEntry(result.file, result.size, result.mtime_ns, result.digest, result.parser, rows))
+
+    def iter_results(self, once: bool = False) -> Iterator[IngestResult]:
+        """
+        Scan every interval seconds until interrupted, or with once until all files present at the start are ingested.
+        """
+
+        pending: set[Future] = set()
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker) as executor:
+            try:
+                while True:
+                    for file in self.scan():
+                        if len(pending) >= self.max_pending:
+                            break
+
+                        self.in_flight.add(file)
+                        pending.add(executor.submit(ingest_file, file, self.password, self.bank, self.strict, self.manifest.get(file)))
+
+                    if once and not pending and not self.settling:
+                        return
+
+                    if not pending:
+                        # wait() returns at once on no futures
+                        time.sleep(self.interval)
+                        continue
+
+                    done, pending = wait(pending, timeout=self.interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        result = future.result()
+                        self.in_flight.discard(result.file)
+                        yield result
+                        self.record(result)
+            finally:
+                for future in pending:
+                    future.cancel()
@@ -0,0 +1,28 @@
+"""
+Statements built by benchmarks.synthetic for the tests.
+"""
+
+import re
+
+from benchmarks.synthetic import GENERATORS, build_pdf
+
+
+def get_statement(bank: str, pages: int = 2, seed: int = 0) -> bytes:
+    return build_pdf(GENERATORS[bank](pages, seed))
+
+
+def write_statement(path: str, bank: str = 'bca-debit', pages: int = 2, seed: int = 0) -> str:
+    with open(path, 'wb') as f:
+        f.write(get_statement(bank, pages, seed))
+
+    return path
+
+
+def write_broken_statement(path: str) -> str:
+    texts = GENERATORS['bca-credit'](1)
+    # Unknown transaction date, the whole file fails in strict mode
+    texts[0] = re.sub(r'^\d{2}-JAN', '32-JAN', texts[0], count=1, flags=re.M)
+    with open(path, 'wb') as f:
+        f.write(build_pdf(texts))
+
+    return path
@@ -0,0 +1,42 @@
+import asyncio
+
+from concurrent.futures import ThreadPoolExecutor
+
+from bank_scrape.aio import parse_async, stream_many_async
+from bank_scrape.batch import parse_file
+from tests.statements import get_statement
+
+
+def test_parse_async():
+    data = get_statement('bca-credit')
+    assert asyncio.run(parse_async(data, None)) == parse_file(data, None)
+
+
+def test_stream_keeps_the_source_order():
+    sources = [get_statement(bank, seed=i) for i, bank in enumerate(('bca-debit', 'bca-credit', 'jenius-credit', 'bca-debit'))]
+
+    async def collect() -> list:
+        return [row async for row in stream_many_async(sources, None, concurrency=2)]
+
+    assert asyncio.run(collect()) == [row for source in sources for row in parse_file(source, None)]
+
+
+def test_sources_are_read_as_the_rows_are_consumed():
+    sources = [get_statement('bca-debit', seed=i) for i in range(6)]
+    read = []
+
+    async def iter_sources():
+        for i, source in enumerate(sources):
+            read.append(i)
+            yield source
+
+    async def consume_first_row() -> int:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            stream = stream_many_async(iter_sources(), None, 'bca-debit', concurrency=2, executor=executor)
+            await anext(stream)
+            # The stream is suspended after the first row, only concurrency files were submitted
+            count = len(read)
+            await stream.aclose()
+            return count
+
+    assert asyncio.run(consume_first_row()) == 2
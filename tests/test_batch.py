@@ -0,0 +1,19 @@
+from bank_scrape import bca_credit, bca_debit
+from bank_scrape.batch import iter_parse_many, parse_many
+from bank_scrape.utils.common import open_pdf
+from tests.statements import write_statement
+
+
+def test_parse_many_keeps_the_file_order(tmp_path):
+    files = [write_statement(str(tmp_path / f'{i}.pdf'), 'bca-debit') for i in range(4)]
+    rows = bca_debit.parse(open_pdf(files[0]))
+
+    results = list(iter_parse_many(files, None, 'bca-debit', workers=2))
+    assert [file for file, _ in results] == files
+    assert all(file_rows == rows for _, file_rows in results)
+    assert parse_many(files, None, 'bca-debit', workers=2) == rows * len(files)
+
+
+def test_parse_many_bca_credit(tmp_path):
+    file = write_statement(str(tmp_path / 'credit.pdf'), 'bca-credit')
+    assert parse_many([file], None, 'bca-credit', workers=1) == bca_credit.parse(open_pdf(file))
@@ -0,0 +1,37 @@
+from bank_scrape import bca_debit
+from bank_scrape.sources import ExtractedTextSource, MemoizedTextSource
+from bank_scrape.stats import ParseStats
+from benchmarks.synthetic import generate_bca_debit
+
+
+class CountingTextSource(MemoizedTextSource):
+
+    def __init__(self, texts: list[str]) -> None:
+        super().__init__(len(texts))
+        self.pages = texts
+        self.extracted: list[int] = []
+
+    def extract_text(self, page: int) -> str:
+        self.extracted.append(page)
+        return self.pages[page]
+
+
+def test_pages_after_the_end_of_document_are_skipped():
+    # The last page holds the terms and conditions, after the SALDO AWAL line
+    texts = generate_bca_debit(3)
+    source = CountingTextSource(texts)
+    stats = ParseStats()
+
+    rows = bca_debit.parse(source, stats=stats)
+    assert rows == bca_debit.parse(ExtractedTextSource(texts[:-1]))
+    assert source.extracted == [0, 1, 2]
+    assert (stats.pages, stats.skipped_pages) == (3, 1)
+    assert ('bank_scrape_skipped_pages_total', {}, 1) in stats.to_metrics()
+
+
+def test_statement_without_trailing_pages():
+    texts = generate_bca_debit(2)[:-1]
+    stats = ParseStats()
+
+    assert bca_debit.parse(ExtractedTextSource(texts), stats=stats)
+    assert (stats.pages, stats.skipped_pages) == (2, 0)
@@ -0,0 +1,52 @@
+from bank_scrape import bca_debit
+from bank_scrape.cache import ParseCache
+from bank_scrape.utils.common import open_pdf
+from tests.statements import get_statement, write_statement
+
+
+def test_hit_returns_the_same_rows(tmp_path):
+    file = write_statement(str(tmp_path / 'debit.pdf'), 'bca-debit')
+    with ParseCache(str(tmp_path / 'cache.db')) as cache:
+        rows = cache.parse(file, None, 'bca-debit')
+        assert rows == bca_debit.parse(open_pdf(file))
+        assert (cache.hits, cache.misses) == (0, 1)
+
+        # Keyed by content, not by path
+        assert cache.parse(get_statement('bca-debit'), None, 'bca-debit') == rows
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    # Persisted
+    with ParseCache(str(tmp_path / 'cache.db')) as cache:
+        assert cache.parse(file, None, 'bca-debit') == rows
+        assert cache.hits == 1
+
+
+def test_new_parser_version_is_a_miss(tmp_path, monkeypatch):
+    data = get_statement('bca-debit')
+    with ParseCache(str(tmp_path / 'cache.db')) as cache:
+        cache.parse(data, None, 'bca-debit')
+        monkeypatch.setattr(bca_debit, 'PARSER_VERSION', f'{bca_debit.PARSER_VERSION}-next')
+        cache.parse(data, None, 'bca-debit')
+        assert (cache.hits, cache.misses) == (0, 2)
+
+
+def get_entry_sizes(cache: ParseCache) -> dict[str, int]:
+    return dict(cache.db.execute('SELECT parser, size FROM parse_cache'))
+
+
+def test_least_recently_used_is_evicted(tmp_path):
+    debit, credit = get_statement('bca-debit'), get_statement('bca-credit')
+    with ParseCache(str(tmp_path / 'sizes.db')) as cache:
+        cache.parse(debit, None, 'bca-debit')
+        cache.parse(credit, None, 'bca-credit')
+        sizes = get_entry_sizes(cache)
+
+    with ParseCache(str(tmp_path / 'cache.db'), max_size=max(sizes.values())) as cache:
+        cache.parse(debit, None, 'bca-debit')
+        cache.parse(credit, None, 'bca-credit')
+        # Both don't fit, the debit entry was used the longest ago
+        assert cache.evictions == 1
+        assert get_entry_sizes(cache).keys() == {x for x in sizes if x.startswith('bca-credit:')}
+
+        cache.parse(debit, None, 'bca-debit')
+        assert cache.misses == 3
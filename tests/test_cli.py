@@ -0,0 +1,54 @@
+import csv
+import json
+
+import pytest
+
+from bank_scrape import cli
+from bank_scrape.batch import parse_file
+from benchmarks.synthetic import GENERATORS
+from tests.statements import write_broken_statement, write_statement
+
+
+def test_parse_csv(tmp_path):
+    files = [write_statement(str(tmp_path / f'{bank}.pdf'), bank) for bank in GENERATORS]
+    output = str(tmp_path / 'rows.csv')
+    assert cli.main(['parse', *files, '--workers', '1', '--output', output]) == 0
+
+    with open(output, newline='') as f:
+        reader = csv.DictReader(f)
+        rows = list(reader)
+    # The columns of all formats, in the file order
+    assert reader.fieldnames == cli.get_fields('auto')
+    assert [row['description'] for row in rows] == [row.description for file in files for row in parse_file(file, None)]
+
+
+def test_parse_jsonl_to_stdout(tmp_path, capsys):
+    file = write_statement(str(tmp_path / 'debit.pdf'), 'bca-debit')
+    assert cli.main(['parse', file, '--bank', 'bca-debit', '--workers', '1', '--format', 'jsonl']) == 0
+
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line) for line in lines] == [json.loads(row.model_dump_json()) for row in parse_file(file, None, 'bca-debit')]
+
+
+def test_failed_file_is_skipped(tmp_path, capsys):
+    good = write_statement(str(tmp_path / 'good.pdf'), 'bca-debit')
+    bad = write_broken_statement(str(tmp_path / 'bad.pdf'))
+    output = str(tmp_path / 'rows.jsonl')
+
+    assert cli.main(['parse', bad, good, '--workers', '1', '--format', 'jsonl', '--output', output]) == 1
+    with open(output) as f:
+        assert len(f.readlines()) == len(parse_file(good, None))
+
+    err = capsys.readouterr().err
+    assert f'{bad}: ' in err
+    assert '1 of 2 files failed' in err
+
+
+def test_parquet(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    file = write_statement(str(tmp_path / 'credit.pdf'), 'bca-credit')
+    output = str(tmp_path / 'rows.parquet')
+
+    assert cli.main(['parse', file, '--workers', '1', '--format', 'parquet']) == 2
+    assert cli.main(['parse', file, file, '--workers', '1', '--format', 'parquet', '--output', output]) == 0
+    assert pq.ParquetFile(output).metadata.num_rows == 2 * len(parse_file(file, None))
@@ -0,0 +1,70 @@
+import pytest
+
+from bank_scrape import bca_credit, bca_debit, columnar
+from bank_scrape.columnar import ColumnarStatement, ParquetSink, parse_columnar
+from bank_scrape.utils.common import open_pdf
+from tests.statements import write_statement
+
+# The columnar extra
+pq = pytest.importorskip('pyarrow.parquet')
+
+
+@pytest.mark.parametrize('bank, parser', [('bca-credit', bca_credit), ('bca-debit', bca_debit)])
+def test_columns_hold_the_parsed_rows(tmp_path, bank, parser):
+    file = write_statement(str(tmp_path / 'statement.pdf'), bank)
+    rows = parser.parse(open_pdf(file))
+
+    statement = parse_columnar(open_pdf(file))
+    assert len(statement) == len(rows)
+    assert statement.to_rows() == rows
+
+    # Card numbers are dictionary-encoded, repeated on every row but stored once
+    assert statement.dictionaries['card_number'] == {rows[0].card_number: 0}
+    table = statement.to_arrow()
+    assert table.num_rows == len(rows)
+    assert str(table.schema.field('transaction_date').type) == 'date32[day]'
+    assert statement.to_numpy()['description'].tolist() == [row.description for row in rows]
+
+
+class ChunkCountingStatement(ColumnarStatement):
+    def __init__(self, row_type, pulled: list) -> None:
+        super().__init__(row_type)
+        self.pulled = pulled
+        self.chunks = []
+
+    def extend_list(self, records):
+        # Only the chunk being converted is pulled ahead of the stored rows
+        assert len(self.pulled) == len(self) + len(records)
+        self.chunks.append(len(records))
+        return super().extend_list(records)
+
+
+def test_extend_consumes_a_stream_in_chunks(tmp_path, monkeypatch):
+    file = write_statement(str(tmp_path / 'statement.pdf'), 'bca-debit')
+    records = list(bca_debit.iter_records(open_pdf(file)))
+    monkeypatch.setattr(columnar, 'EXTEND_CHUNK_ROWS', 4)
+
+    pulled = []
+    def iter_records():
+        for record in records:
+            pulled.append(record)
+            yield record
+
+    statement = ChunkCountingStatement(bca_debit.PdfParsedRow, pulled).extend(iter_records())
+    assert sum(statement.chunks) == len(records) and max(statement.chunks) == 4
+    assert statement.to_rows() == ColumnarStatement(bca_debit.PdfParsedRow).extend_list(records).to_rows()
+
+
+def test_parquet_sink_writes_a_row_group_per_statement(tmp_path):
+    files = [write_statement(str(tmp_path / f'{i}.pdf'), 'bca-credit') for i in range(2)]
+    path = str(tmp_path / 'rows.parquet')
+    with ParquetSink(path, bca_credit.PdfParsedRow) as sink:
+        for file in files:
+            sink.write(parse_columnar(open_pdf(file), 'bca-credit'))
+
+        with pytest.raises(Exception, match='Cannot write'):
+            sink.write(parse_columnar(open_pdf(write_statement(str(tmp_path / 'debit.pdf'), 'bca-debit'))))
+
+    parquet = pq.ParquetFile(path)
+    assert parquet.num_row_groups == 2
+    assert parquet.metadata.num_rows == 2 * len(bca_credit.parse(open_pdf(files[0])))
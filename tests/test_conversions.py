@@ -0,0 +1,88 @@
+from datetime import date
+
+import pytest
+
+from bank_scrape import bca_credit, bca_debit, jenius_credit
+from bank_scrape.utils.common import get_cents
+
+
+@pytest.mark.parametrize('amount, cents', [
+    ('1,234,567.89', 123456789),
+    ('1,234,567', 123456700),
+    ('1,234.5', 123450),
+    ('.05', 5),
+    ('0.00', 0),
+])
+def test_get_cents(amount, cents):
+    assert get_cents(amount, ',', '.') == cents
+    # Same with the separators swapped
+    assert get_cents(amount.translate(str.maketrans(',.', '.,')), '.', ',') == cents
+
+
+@pytest.mark.parametrize('amount, cents', [
+    ('1.234.567', -123456700),
+    ('1.234.567CR', 123456700),
+    ('1.234.567 CR', 123456700),
+    ('150.000,50', -15000050),
+    ('150.000,50 CR', 15000050),
+])
+def test_bca_credit_amount(amount, cents):
+    assert bca_credit.get_amount(amount) == cents
+
+
+@pytest.mark.parametrize('amount, cents', [
+    ('1,500,000.00 DB', -150000000),
+    ('1,500,000 DB', -150000000),
+    ('2,000,000.00', 200000000),
+    ('2,000,000', 200000000),
+    ('10.5 DB', -1050),
+])
+def test_bca_debit_amount(amount, cents):
+    assert bca_debit.get_amount(amount) == cents
+
+
+@pytest.mark.parametrize('amount, cents', [
+    ('1,234.56', -123456),
+    ('1,234.56 CR', 123456),
+    ('1,234 CR', 123400),
+])
+def test_jenius_credit_amount(amount, cents):
+    assert jenius_credit.get_amount(amount) == cents
+
+
+def test_bca_credit_dates_cross_the_year_boundary():
+    dates = bca_credit.get_dates(date(2024, 1, 15))
+    assert dates['02-JAN'] == date(2024, 1, 2)
+    assert dates['20-DES'] == date(2023, 12, 20)
+    # Both spellings of August
+    assert dates['17-AGS'] == dates['17-AGU'] == date(2023, 8, 17)
+    # 2023 isn't a leap year
+    assert '29-FEB' not in dates
+    assert '31-NOV' not in dates
+
+    dates = bca_credit.get_dates(date(2024, 3, 15))
+    assert dates['29-FEB'] == date(2024, 2, 29)
+    assert dates['15-MAR'] == date(2024, 3, 15)
+
+
+def test_bca_debit_dates():
+    dates = bca_debit.get_dates(2024)
+    assert dates['01/01'] == date(2024, 1, 1)
+    assert dates['29/02'] == date(2024, 2, 29)
+    assert dates['31/12'] == date(2024, 12, 31)
+    assert '30/02' not in dates
+    assert len(dates) == 366
+
+
+def test_jenius_dates_are_resolved_once():
+    dates = {}
+    assert jenius_credit.get_date('31 Des 2023', dates) == date(2023, 12, 31)
+    assert jenius_credit.get_date('01 Jan 2024', dates) == date(2024, 1, 1)
+    assert dates == {'31 Des 2023': date(2023, 12, 31), '01 Jan 2024': date(2024, 1, 1)}
+
+
+def test_invalid_date():
+    with pytest.raises(Exception, match='Invalid date: 32-JAN'):
+        bca_credit.get_date('32-JAN', bca_credit.get_dates(date(2024, 1, 15)))
+    with pytest.raises(Exception, match='Invalid date: 31/02'):
+        bca_debit.get_date('31/02', bca_debit.get_dates(2024))
@@ -0,0 +1,85 @@
+import io
+import os
+
+from concurrent.futures import Future
+from PyPDF2 import PdfReader, PdfWriter
+
+from bank_scrape import decrypt
+from bank_scrape.decrypt import decrypt_batch
+from benchmarks.synthetic import build_pdf, generate_bca_debit
+
+
+def write_statement(path: str, password: str | None, seed: int = 0) -> None:
+    data = build_pdf(generate_bca_debit(1, seed))
+    if password is not None:
+        writer = PdfWriter()
+        writer.append_pages_from_reader(PdfReader(io.BytesIO(data)))
+        writer.encrypt(password)
+        output = io.BytesIO()
+        writer.write(output)
+        data = output.getvalue()
+
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+class InlineExecutor:
+    """
+    Runs each task as it is submitted, so that the rounds of decrypt_batch don't depend on the timing of the workers.
+    """
+
+    def __init__(self, max_workers: int | None = None) -> None:
+        pass
+
+    def __enter__(self) -> 'InlineExecutor':
+        return self
+
+    def __exit__(self, *args) -> None:
+        pass
+
+    def submit(self, fn, *args) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+
+        return future
+
+
+def test_failed_files_dont_stop_the_batch(tmp_path):
+    files = []
+    # The first file of the prefix uses another password, the batch keeps probing the rest of the prefix
+    for i, (prefix, password) in enumerate((('ALICE', 'other'), ('ALICE', 'secret'), ('ALICE', 'secret'), ('BOB', 'secret'), ('BOB', None))):
+        files.append(str(tmp_path / f'{prefix}_{i}.pdf'))
+        write_statement(files[-1], password, i)
+
+    out_files, failed_files = decrypt_batch(files, ['nope', 'secret'], str(tmp_path / 'out'), workers=2)
+
+    assert list(failed_files) == [files[0]]
+    assert 'None of the passwords' in failed_files[files[0]]
+    assert sorted(out_files) == sorted(files[1:])
+    for out_file in out_files.values():
+        assert not PdfReader(out_file).is_encrypted
+    assert not os.path.exists(tmp_path / 'out' / os.path.basename(files[0]))
+
+
+
+def test_unencrypted_probe_submits_the_rest_of_the_prefix(tmp_path, monkeypatch):
+    files = []
+    for i in range(3):
+        files.append(str(tmp_path / f'ALICE_{i}.pdf'))
+        write_statement(files[-1], None, i)
+
+    rounds = []
+    def wait(futures, return_when):
+        rounds.append(len(futures))
+        return set(futures), set()
+
+    monkeypatch.setattr(decrypt, 'ProcessPoolExecutor', InlineExecutor)
+    monkeypatch.setattr(decrypt, 'wait', wait)
+    out_files, failed_files = decrypt_batch(files, ['secret'], str(tmp_path / 'out'))
+
+    # The probe, then the two other files at once
+    assert rounds == [1, 2]
+    assert sorted(out_files) == files and not failed_files
@@ -0,0 +1,72 @@
+import pickle
+
+import pytest
+
+from bank_scrape import bca_credit, cli
+from bank_scrape.batch import parse_many
+from bank_scrape.diagnostics import Diagnostic, ParseError
+from bank_scrape.parsers import get_parser
+from bank_scrape.sources import ExtractedTextSource
+from benchmarks.synthetic import GENERATORS
+from tests.statements import write_broken_statement, write_statement
+
+# Settlement month of the synthetic statements, in the header of every page
+SETTLEMENT_MONTHS = {
+    'bca-credit': 'JANUARI',
+    'bca-debit': 'JANUARI',
+    'jenius-credit': 'Januari',
+}
+
+
+@pytest.mark.parametrize('bank', GENERATORS)
+def test_invalid_header_is_reported(bank):
+    texts = GENERATORS[bank](3)
+    # Only the first page has an unknown month
+    texts[0] = texts[0].replace(SETTLEMENT_MONTHS[bank], 'SMARCH', 1)
+    parser = get_parser(bank)
+
+    with pytest.raises(ParseError) as e:
+        parser.parse(ExtractedTextSource(texts))
+    assert e.value.diagnostic.rule == 'invalid_settlement_date'
+
+    diagnostics = []
+    rows = parser.parse(ExtractedTextSource(texts), strict=False, diagnostics=diagnostics)
+    assert diagnostics[0].rule == 'invalid_settlement_date'
+    assert diagnostics[0].page == 1
+    assert 'SMARCH' in diagnostics[0].line
+    # The next pages set the settlement date again
+    assert rows
+
+
+def test_diagnostic_keeps_the_raw_line():
+    texts = GENERATORS['bca-credit'](1)
+    lines = texts[0].split('\n')
+    i = next(i for i, line in enumerate(lines) if line[:2].isdigit() and line[2] == '-')
+    lines[i] = f'\t32-JAN  {lines[i][7:]} '
+    texts[0] = '\n'.join(lines)
+
+    diagnostics = []
+    bca_credit.parse(ExtractedTextSource(texts), strict=False, diagnostics=diagnostics)
+    assert diagnostics[0].rule == 'invalid_transaction'
+    assert diagnostics[0].line == lines[i]
+    assert diagnostics[0].line_number == i + 1
+
+
+def test_parse_error_pickles():
+    error = pickle.loads(pickle.dumps(ParseError(Diagnostic(rule='invalid_transaction', message='Invalid date: 32-JAN'))))
+    assert str(error) == 'Invalid date: 32-JAN'
+    assert error.diagnostic.rule == 'invalid_transaction'
+
+
+def test_parse_error_in_a_worker_only_fails_its_file(tmp_path, capsys):
+    good = write_statement(str(tmp_path / 'good.pdf'), 'bca-debit')
+    bad = write_broken_statement(str(tmp_path / 'bad.pdf'))
+
+    with pytest.raises(ParseError):
+        parse_many([good, bad], None, workers=1)
+
+    output = str(tmp_path / 'rows.jsonl')
+    assert cli.main(['parse', good, bad, '--workers', '1', '--format', 'jsonl', '--output', output]) == 1
+    with open(output) as f:
+        assert len(f.readlines()) == len(parse_many([good], None, workers=1))
+    assert f'{bad}: Invalid date: 32-JAN' in capsys.readouterr().err
@@ -0,0 +1,36 @@
+import pytest
+
+from bank_scrape import jenius_credit
+from bank_scrape.diagnostics import ParseError
+from bank_scrape.sources import ExtractedTextSource
+from bank_scrape.stats import ParseStats
+from benchmarks.synthetic import generate_jenius_credit
+
+
+def remove_amount(texts: list[str], page: int, transaction: int) -> list[str]:
+    # Drop the amount line of the given transaction of the page
+    lines = texts[page].split('\n')
+    amounts = [i for i, line in enumerate(lines) if jenius_credit.AMOUNT_PATTERN.match(line)]
+    del lines[amounts[transaction]]
+    return [*texts[:page], '\n'.join(lines), *texts[page + 1:]]
+
+
+@pytest.mark.parametrize('transaction', [0, -1])
+def test_missing_amount_stops_at_the_next_transaction(transaction):
+    texts = generate_jenius_credit(2)
+    expected = jenius_credit.parse(ExtractedTextSource(texts))
+    texts = remove_amount(texts, 1, transaction)
+
+    stats = ParseStats()
+    diagnostics = []
+    rows = jenius_credit.parse(ExtractedTextSource(texts), stats=stats, strict=False, diagnostics=diagnostics)
+
+    assert [x.rule for x in diagnostics] == ['amount_not_found']
+    assert len(rows) == len(expected) - 1
+    # The amount isn't taken from the following transaction, and the terms page is never extracted
+    skipped = {x.order for x in expected} - {x.order for x in rows}
+    assert [(x.amount_cents, x.description) for x in rows] == [(x.amount_cents, x.description) for x in expected if x.order not in skipped]
+    assert stats.skipped_pages == 1
+
+    with pytest.raises(ParseError):
+        jenius_credit.parse(ExtractedTextSource(texts))
@@ -0,0 +1,29 @@
+import pytest
+
+from bank_scrape import bca_credit, bca_debit
+from bank_scrape.batch import parse_many
+from bank_scrape.parsers import detect_bank, parse_any
+from bank_scrape.utils.common import open_pdf
+from benchmarks.synthetic import GENERATORS
+from tests.statements import write_statement
+
+
+@pytest.mark.parametrize('bank', GENERATORS)
+def test_detect_bank(bank):
+    assert detect_bank(GENERATORS[bank](1)[0]) == bank
+
+
+def test_unknown_format():
+    with pytest.raises(Exception, match='Unknown statement format'):
+        detect_bank('SOME OTHER BANK\nSTATEMENT')
+
+
+@pytest.mark.parametrize('bank, parser', [('bca-credit', bca_credit), ('bca-debit', bca_debit)])
+def test_parse_any_matches_the_parser(tmp_path, bank, parser):
+    file = write_statement(str(tmp_path / 'statement.pdf'), bank)
+    assert parse_any(open_pdf(file)) == parser.parse(open_pdf(file))
+
+
+def test_parse_many_detects_each_file(tmp_path):
+    files = [write_statement(str(tmp_path / f'{bank}.pdf'), bank) for bank in GENERATORS]
+    assert parse_many(files, None, workers=1) == [row for file in files for row in parse_any(open_pdf(file))]
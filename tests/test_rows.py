@@ -0,0 +1,24 @@
+import pickle
+
+import pytest
+
+from bank_scrape.parsers import get_parser
+from bank_scrape.sources import ExtractedTextSource
+from benchmarks.synthetic import GENERATORS
+
+
+@pytest.mark.parametrize('bank', GENERATORS)
+def test_row_tuple_matches_the_model(bank):
+    parser = get_parser(bank)
+    texts = GENERATORS[bank](3)
+    rows = parser.parse(ExtractedTextSource(texts))
+    tuples = parser.parse(ExtractedTextSource(texts), row_type=parser.PdfParsedRowTuple)
+
+    assert parser.PdfParsedRowTuple._fields == tuple(parser.PdfParsedRow.model_fields)
+    assert [tuple(row.model_dump(exclude={'amount'}).values()) for row in rows] == [tuple(x) for x in tuples]
+    assert [(row.amount, row.amount_decimal) for row in rows] == [(x.amount, x.amount_decimal) for x in tuples]
+    assert all(row.model_dump()['amount'] == row.amount for row in rows)
+
+    # Rows are sent back by the worker processes
+    assert pickle.loads(pickle.dumps(tuples)) == tuples
+    assert pickle.loads(pickle.dumps(rows)) == rows
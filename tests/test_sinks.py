@@ -0,0 +1,35 @@
+import pytest
+
+from bank_scrape import bca_debit
+from bank_scrape.sinks import Sink, SqliteSink
+from bank_scrape.utils.common import open_pdf
+from tests.statements import write_statement
+
+
+def test_sqlite_upsert(tmp_path):
+    rows = bca_debit.parse(open_pdf(write_statement(str(tmp_path / 'debit.pdf'), 'bca-debit')))
+    path = str(tmp_path / 'rows.db')
+
+    with SqliteSink(path, 'rows', bca_debit.PdfParsedRow, batch_size=2) as sink:
+        assert sink.write(rows) == len(rows)
+
+        # Loaded again, with one row changed, the rows are updated instead of duplicated
+        changed = rows[0].model_copy(update={'description': 'CHANGED'})
+        sink.write([changed, *rows[1:]])
+        assert sink.rows_written == 2 * len(rows)
+
+        assert sink.connection.execute('SELECT COUNT(*) FROM rows').fetchone()[0] == len(rows)
+        description, amount = sink.connection.execute('SELECT description, amount FROM rows WHERE "order" = ?', (rows[0].order,)).fetchone()
+        assert description == 'CHANGED'
+        assert amount == rows[0].amount
+
+
+def test_sink_without_write_batch_is_rejected():
+    class TransactionOnlySink(Sink):
+        types = {}
+
+        def transaction(self):
+            return self.connection
+
+    with pytest.raises(TypeError):
+        TransactionOnlySink(None, 'rows', bca_debit.PdfParsedRow)
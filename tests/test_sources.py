@@ -0,0 +1,72 @@
+import gc
+import os
+
+import pytest
+
+from bank_scrape import bca_debit
+from bank_scrape.batch import parse_file
+from bank_scrape.columnar import parse_columnar
+from bank_scrape.parsers import parse_any
+from bank_scrape.sources import ExtractedTextSource, MemoizedTextSource, ParallelTextSource
+from benchmarks.synthetic import GENERATORS, build_pdf
+
+
+class CountingTextSource(ExtractedTextSource):
+
+    def __init__(self, texts: list[str]) -> None:
+        super().__init__(texts)
+        self.extracted: list[int] = []
+
+    def extract_text(self, page: int) -> str:
+        self.extracted.append(page)
+        return super().extract_text(page)
+
+
+def test_each_page_extracted_once_when_detecting_then_parsing():
+    source = CountingTextSource(GENERATORS['bca-credit'](5))
+    assert parse_any(source)
+    assert source.extracted == list(range(5))
+    # Only the last page is kept
+    assert source.last_page == 4
+
+
+def test_parallel_source_reads_a_chunk_again():
+    texts = GENERATORS['bca-debit'](5)
+    with ParallelTextSource(build_pdf(texts), workers=1, chunk_pages=2) as source:
+        first = [source.get_text(page) for page in range(source.page_count)]
+        assert len(first) == len(texts)
+        assert source.get_text(0) == first[0]
+        assert source.chunk == 0
+
+
+def count_open_files() -> int:
+    return len(os.listdir('/proc/self/fd'))
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc/self/fd'), reason='counts the open files through /proc')
+def test_path_is_released_once_parsed(tmp_path):
+    path = str(tmp_path / 'statement.pdf')
+    with open(path, 'wb') as f:
+        f.write(build_pdf(GENERATORS['bca-debit'](2)))
+
+    # Only freed by the cyclic garbage collector when leaked
+    gc.disable()
+    try:
+        start = count_open_files()
+        for _ in range(5):
+            bca_debit.parse(path)
+            parse_file(path, None)
+            parse_file(path, None, 'bca-debit')
+            parse_any(path)
+            parse_columnar(path, 'bca-debit')
+        assert count_open_files() <= start
+    finally:
+        gc.enable()
+
+
+def test_source_without_extract_text_is_rejected():
+    class PagelessTextSource(MemoizedTextSource):
+        pass
+
+    with pytest.raises(TypeError):
+        PagelessTextSource(1)
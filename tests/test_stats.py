@@ -0,0 +1,39 @@
+import pytest
+
+from bank_scrape.parsers import get_parser
+from bank_scrape.sources import ExtractedTextSource
+from bank_scrape.stats import ParseStats
+from benchmarks.synthetic import GENERATORS
+
+
+@pytest.mark.parametrize('bank', GENERATORS)
+def test_line_kinds_sum_up_to_lines(bank):
+    stats = ParseStats()
+    rows = get_parser(bank).parse(ExtractedTextSource(GENERATORS[bank](3)), stats=stats)
+
+    assert stats.rows == len(rows)
+    assert stats.lines > 0
+    assert sum(stats.line_kinds.values()) == stats.lines
+
+
+def test_multi_line_transactions_are_counted_once():
+    texts = GENERATORS['bca-credit'](3)
+    stats = ParseStats()
+    get_parser('bca-credit').parse(ExtractedTextSource(texts), stats=stats)
+
+    # Every non-empty line is read, the statement has no end marker
+    assert stats.lines == sum(1 for text in texts for line in text.split('\n') if line)
+    assert stats.line_kinds['transaction_multi_line_end'] == stats.line_kinds['transaction_multi_line_start']
+
+
+def test_jenius_lines_read_past_the_dispatcher_are_counted():
+    texts = GENERATORS['jenius-credit'](5)
+    stats = ParseStats()
+    get_parser('jenius-credit').parse(ExtractedTextSource(texts), stats=stats)
+
+    # Every non-empty line is read until the end of file line
+    lines = [line for text in texts for line in text.split('\n')]
+    end = next(i for i, line in enumerate(lines) if line.strip() == 'Pembayaran Tagihan')
+    assert stats.lines == sum(1 for line in lines[:end + 1] if line.strip())
+    assert stats.line_kinds['transaction_amount'] == stats.line_kinds['transaction_start'] == stats.rows
+    assert stats.line_kinds['transaction_description'] > 0
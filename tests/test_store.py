@@ -0,0 +1,51 @@
+import random
+
+from bank_scrape import bca_credit
+from bank_scrape.sources import ExtractedTextSource
+from bank_scrape.store import StatementStore
+from benchmarks.synthetic import generate_bca_credit
+
+
+def get_rows(seed: int, pages: int = 2) -> list:
+    return bca_credit.parse(ExtractedTextSource(generate_bca_credit(pages, seed)))
+
+
+def test_dedup_across_statements():
+    rows = get_rows(0)
+    store = StatementStore(bca_credit.PdfParsedRow)
+    assert store.add(rows) == len(rows)
+
+    # The next statement prints the same transactions again, with its own settlement date and order
+    again = [row.model_copy(update={'order': row.order + 1000, 'settlement_date': row.settlement_date.replace(month=2)}) for row in rows]
+    assert store.add(again) == 0
+    assert store.duplicates == len(rows)
+    assert len(store) == len(rows)
+
+
+def test_identical_transactions_within_a_statement_are_kept():
+    row = get_rows(0)[0]
+    store = StatementStore(bca_credit.PdfParsedRow)
+    assert store.add([row, row.model_copy(update={'order': row.order + 1})]) == 2
+
+    # Three times in the next statement, only the third is new
+    assert store.add([row.model_copy(update={'order': x}) for x in range(3)]) == 1
+    assert len(store) == 3
+
+
+def test_query_after_incremental_adds():
+    store = StatementStore(bca_credit.PdfParsedRow)
+    rows = []
+    for seed in range(4):
+        statement = get_rows(seed)
+        random.Random(seed).shuffle(statement)
+        rows += statement
+        store.add(statement)
+        # Queried between adds, the index is extended rather than built once
+        for card_number in {row.card_number for row in rows}:
+            expected = sorted((row for row in rows if row.card_number == card_number), key=lambda row: row.transaction_date)
+            assert [(x.transaction_date, x.order) for x in store.query(card_number)] == [(x.transaction_date, x.order) for x in expected]
+
+    card_number = rows[0].card_number
+    start, end = sorted(row.transaction_date for row in rows if row.card_number == card_number)[1::5][:2]
+    assert all(start <= x.transaction_date <= end for x in store.query(card_number, start, end))
+    assert len(store.query(card_number, start, end)) == sum(1 for row in rows if row.card_number == card_number and start <= row.transaction_date <= end)
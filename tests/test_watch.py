@@ -0,0 +1,147 @@
+import os
+import time
+
+import pytest
+
+from benchmarks.synthetic import GENERATORS, build_pdf
+from bank_scrape import watch
+from bank_scrape.watch import FolderWatcher, Manifest, ingest_file
+from tests.statements import write_statement
+
+
+def set_old_mtime(path: str) -> None:
+    # Older than any settle time used here
+    os.utime(path, (time.time() - 3600, time.time() - 3600))
+
+
+def get_watcher(directory: str, manifest: Manifest, **kwargs) -> FolderWatcher:
+    return FolderWatcher(directory, manifest, None, workers=1, interval=0.01, **kwargs)
+
+
+def test_manifest_persists(tmp_path):
+    path = str(tmp_path / 'manifest.db')
+    with Manifest(path) as manifest:
+        manifest.put(watch.ManifestEntry('a.pdf', 10, 20, 'digest', 'bca-debit:2', 5))
+
+    with Manifest(path) as manifest:
+        assert len(manifest) == 1
+        assert manifest.get('a.pdf') == watch.ManifestEntry('a.pdf', 10, 20, 'digest', 'bca-debit:2', 5)
+        assert manifest.get('b.pdf') is None
+
+
+def test_only_new_or_changed_files_are_parsed(tmp_path):
+    inbox = tmp_path / 'inbox'
+    inbox.mkdir()
+    for i, bank in enumerate(('bca-debit', 'bca-credit')):
+        write_statement(str(inbox / f'{i}.pdf'), bank, seed=i)
+        set_old_mtime(str(inbox / f'{i}.pdf'))
+
+    with Manifest(str(tmp_path / 'manifest.db')) as manifest:
+        # Yielded as each file is done
+        results = sorted(get_watcher(str(inbox), manifest).iter_results(once=True), key=lambda x: x.file)
+        assert [os.path.basename(x.file) for x in results] == ['0.pdf', '1.pdf']
+        assert all(x.rows and not x.failed for x in results)
+        assert manifest.get(results[0].file).rows == len(results[0].rows)
+
+        # Same size and mtime, not even read
+        assert list(get_watcher(str(inbox), manifest).iter_results(once=True)) == []
+
+        # Touched, only hashed
+        os.utime(inbox / '0.pdf', (time.time() - 60, time.time() - 60))
+        (result,) = get_watcher(str(inbox), manifest).iter_results(once=True)
+        assert result.unchanged and not result.rows
+        assert manifest.get(result.file).rows == len(results[0].rows)
+
+        # New file
+        write_statement(str(inbox / '2.pdf'), seed=2)
+        set_old_mtime(str(inbox / '2.pdf'))
+        (result,) = get_watcher(str(inbox), manifest).iter_results(once=True)
+        assert os.path.basename(result.file) == '2.pdf' and result.rows
+
+
+def test_failed_file_is_not_recorded(tmp_path):
+    (tmp_path / 'broken.pdf').write_bytes(b'not a pdf')
+    set_old_mtime(str(tmp_path / 'broken.pdf'))
+
+    with Manifest(str(tmp_path / 'manifest.db')) as manifest:
+        watcher = get_watcher(str(tmp_path), manifest)
+        (result,) = watcher.iter_results(once=True)
+        assert result.failed and result.diagnostics[0].rule == 'file'
+        assert manifest.get(result.file) is None
+
+        # Not tried again until changed
+        assert watcher.scan() == []
+
+
+def test_vanished_file_is_reported(tmp_path):
+    result = ingest_file(str(tmp_path / 'gone.pdf'), None, 'auto', True, None)
+    assert result.failed
+    assert result.diagnostics[0].rule == 'file'
+    assert result.diagnostics[0].file == str(tmp_path / 'gone.pdf')
+
+
+def test_debounce(tmp_path, monkeypatch):
+    path = str(tmp_path / 'new.pdf')
+    write_statement(path)
+
+    with Manifest(str(tmp_path / 'manifest.db')) as manifest:
+        watcher = get_watcher(str(tmp_path), manifest, settle_seconds=10)
+        now = time.monotonic()
+        # The file always looks just written
+        monkeypatch.setattr(watch.time, 'time', lambda: os.stat(path).st_mtime)
+
+        monkeypatch.setattr(watch.time, 'monotonic', lambda: now)
+        assert watcher.scan() == []
+        assert path in watcher.settling
+
+        # Still being written, the wait starts again
+        with open(path, 'ab') as f:
+            f.write(b'\n')
+        monkeypatch.setattr(watch.time, 'monotonic', lambda: now + 9)
+        assert watcher.scan() == []
+        monkeypatch.setattr(watch.time, 'monotonic', lambda: now + 15)
+        assert watcher.scan() == []
+
+        # Unchanged for the settle time
+        monkeypatch.setattr(watch.time, 'monotonic', lambda: now + 20)
+        assert watcher.scan() == [path]
+        assert path not in watcher.settling
+
+
+def test_idle_watcher_sleeps_between_scans(tmp_path, monkeypatch):
+    class Stop(Exception):
+        pass
+
+    scans = []
+    sleeps = []
+
+    def scan() -> list[str]:
+        scans.append(1)
+        if len(scans) > 3:
+            raise Stop()
+        return []
+
+    with Manifest(str(tmp_path / 'manifest.db')) as manifest:
+        watcher = get_watcher(str(tmp_path), manifest)
+        monkeypatch.setattr(watcher, 'scan', scan)
+        monkeypatch.setattr(watch.time, 'sleep', sleeps.append)
+        with pytest.raises(Stop):
+            list(watcher.iter_results())
+
+    # One sleep between each scan, not a busy loop
+    assert sleeps == [watcher.interval] * 3
+
+
+def test_partial_file_is_failed_but_recorded(tmp_path):
+    texts = GENERATORS['jenius-credit'](2)
+    # Drop an amount, the transaction is skipped
+    lines = texts[0].split('\n')
+    del lines[next(i for i, line in enumerate(lines) if line[:1].isdigit() and '.' in line)]
+    texts[0] = '\n'.join(lines)
+    (tmp_path / 'partial.pdf').write_bytes(build_pdf(texts))
+    set_old_mtime(str(tmp_path / 'partial.pdf'))
+
+    with Manifest(str(tmp_path / 'manifest.db')) as manifest:
+        (result,) = get_watcher(str(tmp_path), manifest, strict=False).iter_results(once=True)
+        assert result.failed and result.rows
+        assert manifest.get(result.file).rows == len(result.rows)